@@ -0,0 +1,71 @@
+"""比较 JSON 与 JSON5 解析速度
+
+生成包含大量插件的仓库数据，分别使用 pyjson5 与按格式选择的解析方式解析
+
+uv run python -m benchmarks.json_decode --plugins 5000
+"""
+
+import json
+import timeit
+
+import click
+import pyjson5
+
+from src.providers.utils import decode_json
+
+
+def generate_results(count: int) -> dict:
+    """生成模拟的插件测试结果"""
+    return {
+        f"nonebot-plugin-test{i}:nonebot_plugin_test{i}": {
+            "time": "2024-11-23T12:00:00.000000+08:00",
+            "config": "",
+            "version": f"0.{i % 10}.{i % 7}",
+            "test_env": {"python==3.12.7 nonebot2==2.4.0 pydantic==2.10.0": True},
+            "results": {"validation": True, "load": True, "metadata": True},
+            "outputs": {
+                "validation": None,
+                "load": "\n".join(
+                    [
+                        f"插件 nonebot-plugin-test{i} 的版本为 0.1.0。",
+                        f"插件 nonebot-plugin-test{i} 依赖的插件如下：",
+                        "    nonebot_plugin_alconna, nonebot_plugin_localstore",
+                        f"插件 nonebot_plugin_test{i} 加载正常：",
+                        *(f"    输出内容 {j}" for j in range(20)),
+                    ]
+                ),
+                "metadata": {
+                    "name": f"测试插件 {i}",
+                    "description": "用于测试的插件",
+                    "usage": "/test",
+                    "type": "application",
+                    "homepage": f"https://github.com/nonebot/nonebot-plugin-test{i}",
+                    "supported_adapters": ["nonebot.adapters.onebot.v11"],
+                },
+            },
+        }
+        for i in range(count)
+    }
+
+
+@click.command()
+@click.option("--plugins", default=5000, show_default=True, help="插件数量")
+@click.option("--number", default=5, show_default=True, help="每种方式的解析次数")
+def main(plugins: int, number: int):
+    data = json.dumps(
+        generate_results(plugins), ensure_ascii=False, separators=(",", ":")
+    ).encode()
+    click.echo(f"数据大小：{len(data) / 1024 / 1024:.2f} MiB")
+
+    assert decode_json(data, json5=False) == pyjson5.decode_buffer(data, wordlength=0)
+
+    for name, func in {
+        "pyjson5": lambda: pyjson5.decode_buffer(data, wordlength=0),
+        "json": lambda: decode_json(data, json5=False),
+    }.items():
+        seconds = min(timeit.repeat(func, number=1, repeat=number))
+        click.echo(f"{name}: {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
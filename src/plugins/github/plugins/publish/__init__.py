@@ -1,6 +1,6 @@
 from typing import Literal
 
-from nonebot import logger, on_type
+from nonebot import get_driver, logger, on_type
 from nonebot.adapters.github import (
     GitHubBot,
     IssueCommentCreated,
@@ -32,8 +32,10 @@ from src.plugins.github.depends import (
     is_bot_triggered_workflow,
 )
 from src.plugins.github.models import GithubHandler, IssueHandler, RepoInfo
+from src.providers.docker_test import container_pool
 from src.providers.validation.models import PublishType, ValidationDict
 
+from .constants import PLUGIN_TEST_PYTHON_VERSION
 from .depends import (
     get_type_by_labels_name,
 )
@@ -85,6 +87,9 @@ async def check_rule(
     return True
 
 
+# 退出时移除没有使用的测试容器
+get_driver().on_shutdown(container_pool.close)
+
 publish_check_matcher = on_type(
     (IssuesOpened, IssuesReopened, IssuesEdited, IssueCommentCreated),
     rule=Rule(check_rule, publish_related_rule),
@@ -111,6 +116,9 @@ async def handle_publish_plugin_check(
         # 如果需要跳过插件测试，则修改议题内容，确保其包含插件所需信息
         if skip_test:
             await ensure_issue_content(handler)
+        else:
+            # 提前启动测试容器，与之后的请求同时进行
+            container_pool.warm(PLUGIN_TEST_PYTHON_VERSION)
 
         # 检查是否满足发布要求
         # 仅在通过检查的情况下创建拉取请求
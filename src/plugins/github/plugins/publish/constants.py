@@ -6,6 +6,9 @@ COMMIT_MESSAGE_PREFIX = ":beers: publish"
 
 BRANCH_NAME_PREFIX = "publish/issue"
 
+# 发布插件时测试所使用的 Python 版本
+PLUGIN_TEST_PYTHON_VERSION = "3.12"
+
 
 # 基本信息
 PROJECT_LINK_PATTERN = re.compile(ISSUE_PATTERN.format("PyPI 项目名"))
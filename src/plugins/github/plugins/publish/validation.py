@@ -26,6 +26,7 @@ from .constants import (
     PLUGIN_MODULE_NAME_PATTERN,
     PLUGIN_NAME_PATTERN,
     PLUGIN_SUPPORTED_ADAPTERS_PATTERN,
+    PLUGIN_TEST_PYTHON_VERSION,
     PLUGIN_TYPE_PATTERN,
     PROJECT_LINK_PATTERN,
     TAGS_PATTERN,
@@ -110,7 +111,7 @@ async def validate_plugin_info_from_issue(
         # 插件不跳过则运行插件测试
         test_result = await DockerPluginTest(
             project_link, module_name, test_config
-        ).run("3.12")
+        ).run(PLUGIN_TEST_PYTHON_VERSION)
         # 去除颜色字符
         test_output = strip_ansi("\n".join(test_result.outputs))
         metadata = test_result.metadata
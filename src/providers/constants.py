@@ -8,6 +8,7 @@ PYPI_KEY_TEMPLATE = "{project_link}:{module_name}"
 
 # NoneBot 插件商店测试结果
 # https://github.com/nonebot/registry/tree/results
+# 也可以设置为本地路径或 file:// 开头的网址，直接读取已经检出的仓库
 REGISTRY_BASE_URL = (
     os.environ.get("REGISTRY_BASE_URL")
     or "https://raw.githubusercontent.com/nonebot/registry/results"
@@ -21,6 +22,7 @@ REGISTRY_PLUGIN_CONFIG_URL = f"{REGISTRY_BASE_URL}/plugin_configs.json"
 
 # NoneBot 插件商店
 # https://github.com/nonebot/nonebot2/tree/master/assets
+# 同样支持本地路径
 STORE_BASE_URL = (
     os.environ.get("STORE_BASE_URL")
     or "https://raw.githubusercontent.com/nonebot/nonebot2/master/assets"
@@ -34,3 +36,68 @@ STORE_PLUGINS_URL = f"{STORE_BASE_URL}/plugins.json5"
 # https://github.com/orgs/nonebot/packages/container/package/nonetest
 DOCKER_IMAGES_VERSION = os.environ.get("DOCKER_IMAGES_VERSION") or "latest"
 DOCKER_IMAGES = f"ghcr.io/nonebot/nonetest:{{}}-{DOCKER_IMAGES_VERSION}"
+# 插件测试容器的最长运行时间，单位为秒
+# 超时后会强制终止容器
+DOCKER_TEST_TIMEOUT = int(os.environ.get("DOCKER_TEST_TIMEOUT") or 1800)
+# 插件测试容器的资源限制，未设置时不限制
+# 可以使用的 CPU 数量，例如 1.5
+DOCKER_CPUS = float(os.environ.get("DOCKER_CPUS") or 0)
+# CPU 资源紧张时的相对权重，Docker 默认为 1024
+DOCKER_CPU_SHARES = int(os.environ.get("DOCKER_CPU_SHARES") or 0)
+# 内存上限，例如 2g
+DOCKER_MEMORY_LIMIT = os.environ.get("DOCKER_MEMORY_LIMIT") or None
+# 进程数量上限
+DOCKER_PIDS_LIMIT = int(os.environ.get("DOCKER_PIDS_LIMIT") or 0)
+# 设置后测试目录将使用指定大小的内存文件系统，例如 2g
+DOCKER_TMPFS_SIZE = os.environ.get("DOCKER_TMPFS_SIZE") or None
+# 插件测试容器共用的缓存卷，挂载到容器内的 /root/.cache
+# 用于复用 Poetry 等工具下载的依赖，设置为空字符串时不挂载
+DOCKER_CACHE_VOLUME = os.environ.get("DOCKER_CACHE_VOLUME", "nonetest-cache")
+DOCKER_CACHE_PATH = "/root/.cache"
+# 仓库数据为本地文件时，插件列表在测试容器内的挂载路径
+DOCKER_PLUGINS_PATH = "/tmp/plugins.json"
+# 插件测试容器中安装插件所使用的工具，可选 poetry 或 uv
+PLUGIN_TEST_INSTALLER = os.environ.get("PLUGIN_TEST_INSTALLER") or "poetry"
+# 商店测试所使用的 Python 版本，多个版本之间用逗号分隔
+# 设置多个版本时会同时在这些版本中测试插件，插件的测试结果以第一个版本为准
+PLUGIN_TEST_PYTHON_VERSIONS = [
+    version.strip()
+    for version in os.environ.get("PLUGIN_TEST_PYTHON_VERSIONS", "").split(",")
+    if version.strip()
+] or ["3.12"]
+# 每个 Python 版本预先启动的空闲测试容器数量
+DOCKER_POOL_SIZE = int(os.environ.get("DOCKER_POOL_SIZE") or 1)
+
+# HTTP 客户端
+# 所有对外请求共用同一个连接池
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT") or 30)
+""" 请求超时时间，单位为秒 """
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS") or 20)
+""" 连接池的最大连接数 """
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS") or 10
+)
+""" 连接池中保持活跃的最大连接数 """
+PYPI_CONCURRENCY = int(os.environ.get("PYPI_CONCURRENCY") or 16)
+""" 批量获取 PyPI 数据时的最大并发数 """
+
+# HTTP 缓存
+# 设置缓存目录后，PyPI 等数据会缓存在磁盘上，并在下次请求时通过 ETag/Last-Modified 重新验证
+HTTP_CACHE_DIR = os.environ.get("HTTP_CACHE_DIR")
+""" 缓存目录，为空时不启用缓存 """
+HTTP_CACHE_TTL = int(os.environ.get("HTTP_CACHE_TTL") or 7 * 24 * 60 * 60)
+""" 缓存超过该时间未被验证则视为过期，单位为秒 """
+HTTP_CACHE_MAX_SIZE = int(os.environ.get("HTTP_CACHE_MAX_SIZE") or 256 * 1024 * 1024)
+""" 缓存目录的最大容量，超出后优先删除最久未使用的缓存，单位为字节 """
+
+# 本地数据
+LOCAL_MMAP_THRESHOLD = int(os.environ.get("LOCAL_MMAP_THRESHOLD") or 1024 * 1024)
+""" 本地文件超过该大小时通过内存映射读取，单位为字节 """
+
+# JSON 序列化
+JSON_SERIALIZER = os.environ.get("JSON_SERIALIZER") or "json"
+""" 保存 JSON 文件时使用的序列化方式
+
+json 为标准库，pydantic 为 pydantic_core，后者更快
+除了模型字段中的 NaN 与 Infinity 会输出为 null，两者输出一致
+"""
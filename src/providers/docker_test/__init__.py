@@ -1,10 +1,30 @@
+import asyncio
+import contextlib
 import json
-from typing import TypedDict
+from collections import defaultdict
+from typing import Any, TypedDict
 
 import docker
+from docker.errors import ContainerError
+from docker.models.containers import Container
 from pydantic import BaseModel, Field, SkipValidation, field_validator
 
-from src.providers.constants import DOCKER_IMAGES, REGISTRY_PLUGINS_URL
+from src.providers.constants import (
+    DOCKER_CACHE_PATH,
+    DOCKER_CACHE_VOLUME,
+    DOCKER_CPU_SHARES,
+    DOCKER_CPUS,
+    DOCKER_IMAGES,
+    DOCKER_MEMORY_LIMIT,
+    DOCKER_PIDS_LIMIT,
+    DOCKER_PLUGINS_PATH,
+    DOCKER_POOL_SIZE,
+    DOCKER_TEST_TIMEOUT,
+    DOCKER_TMPFS_SIZE,
+    PLUGIN_TEST_INSTALLER,
+    REGISTRY_PLUGINS_URL,
+)
+from src.providers.utils import url_to_path
 
 
 class Metadata(TypedDict):
@@ -35,8 +55,20 @@ class DockerTestResult(BaseModel):
     """
     metadata: SkipValidation[Metadata] | None
     """ 插件元数据 """
+    dependencies: list[str] | None = None
+    """ 插件依赖的商店插件的模块名 """
+    requirements: dict[str, str] | None = None
+    """ 测试环境中安装的所有包及其版本 """
     outputs: list[str]
     """ 测试输出 """
+    peak_memory: int | None = None
+    """ 测试时子进程的峰值内存，单位为 KB，批量测试时可能无法获取 """
+    cpu_time: float | None = None
+    """ 测试时子进程占用的 CPU 时间，单位为秒 """
+    duration: float | None = None
+    """ 测试耗时，单位为秒 """
+    install_size: int | None = None
+    """ 插件安装后虚拟环境的大小，单位为字节 """
 
     @field_validator("config", mode="before")
     @classmethod
@@ -44,6 +76,256 @@ class DockerTestResult(BaseModel):
         return v or ""
 
 
+def get_volumes() -> dict[str, dict[str, str]] | None:
+    """测试容器需要挂载的卷
+
+    挂载共用的缓存卷，复用之前测试时下载的依赖
+    新建的卷会自动复制镜像中预先下载好的缓存
+    仓库数据为本地文件时，还需要挂载插件列表，容器内无法访问宿主机的路径
+    """
+    volumes: dict[str, dict[str, str]] = {}
+    if DOCKER_CACHE_VOLUME:
+        volumes[DOCKER_CACHE_VOLUME] = {"bind": DOCKER_CACHE_PATH, "mode": "rw"}
+    if path := url_to_path(REGISTRY_PLUGINS_URL):
+        volumes[str(path.resolve())] = {"bind": DOCKER_PLUGINS_PATH, "mode": "ro"}
+    return volumes or None
+
+
+def get_plugins_url() -> str:
+    """测试容器中获取插件列表的网址
+
+    本地的插件列表会挂载到容器中，通过 file:// 网址读取
+    """
+    if url_to_path(REGISTRY_PLUGINS_URL):
+        return f"file://{DOCKER_PLUGINS_PATH}"
+    return REGISTRY_PLUGINS_URL
+
+
+def get_resource_limits() -> dict[str, Any]:
+    """测试容器的资源限制
+
+    避免单个插件占用过多资源，影响同时测试的其他插件
+    """
+    limits: dict[str, Any] = {}
+    if DOCKER_CPUS:
+        limits["nano_cpus"] = int(DOCKER_CPUS * 1e9)
+    if DOCKER_CPU_SHARES:
+        limits["cpu_shares"] = DOCKER_CPU_SHARES
+    if DOCKER_MEMORY_LIMIT:
+        # 同时限制交换空间，超出内存上限时直接终止进程
+        limits["mem_limit"] = DOCKER_MEMORY_LIMIT
+        limits["memswap_limit"] = DOCKER_MEMORY_LIMIT
+    if DOCKER_PIDS_LIMIT:
+        limits["pids_limit"] = DOCKER_PIDS_LIMIT
+    if DOCKER_TMPFS_SIZE:
+        # 虚拟环境中的扩展模块需要可执行权限
+        limits["tmpfs"] = {"/tmp/plugin_test": f"size={DOCKER_TMPFS_SIZE},exec"}
+    return limits
+
+
+def start_idle_container(version: str) -> Container:
+    """启动一个空闲的测试容器，之后通过 exec 在其中运行插件测试"""
+    client = docker.DockerClient(base_url="unix://var/run/docker.sock")
+    return client.containers.run(
+        DOCKER_IMAGES.format(version),
+        command=["sleep", "infinity"],
+        volumes=get_volumes(),
+        detach=True,
+        **get_resource_limits(),
+    )
+
+
+class ContainerPool:
+    """预先启动的空闲测试容器池
+
+    容器启动与镜像加载需要一定时间，提前启动容器可以让插件测试时直接开始安装插件
+    容器使用一次之后就会被移除，不会自动补充，需要时再调用 warm 启动新的容器
+    """
+
+    def __init__(self, size: int = DOCKER_POOL_SIZE):
+        self.size = size
+        self._containers: defaultdict[str, list[asyncio.Task[Container]]] = defaultdict(
+            list
+        )
+
+    def warm(self, version: str) -> None:
+        """在后台启动容器，直到空闲容器数量达到池的大小
+
+        Args:
+            version (str): 对应的 Python 版本
+        """
+        tasks = self._containers[version]
+        while len(tasks) < self.size:
+            tasks.append(
+                asyncio.create_task(asyncio.to_thread(start_idle_container, version))
+            )
+
+    async def claim(self, version: str) -> Container | None:
+        """取出一个空闲容器
+
+        没有预先启动的容器或者容器启动失败时返回 None
+        """
+        tasks = self._containers.get(version)
+        if not tasks:
+            return None
+
+        task = tasks.pop(0)
+        try:
+            container = await start_container(task)
+        except Exception:
+            return None
+        return container
+
+    async def close(self) -> None:
+        """移除所有空闲容器"""
+        tasks = [task for tasks in self._containers.values() for task in tasks]
+        self._containers.clear()
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if not isinstance(result, BaseException):
+                await asyncio.to_thread(result.remove, force=True)
+
+
+container_pool = ContainerPool()
+"""测试容器池"""
+
+
+async def start_container(task: asyncio.Task[Container]) -> Container:
+    """等待容器启动完成
+
+    线程中的启动操作无法被取消，如果等待时被取消，则等容器启动完成后将其移除，避免遗留容器
+    """
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        with contextlib.suppress(Exception):
+            container = await task
+            await asyncio.to_thread(container.remove, force=True)
+        raise
+
+
+async def run_container(
+    version: str,
+    environment: dict[str, str],
+    time_limit: float,
+    check: bool = True,
+    partial: bool = False,
+) -> bytes | None:
+    """运行测试容器并返回标准输出
+
+    如果容器池中有空闲容器，则直接在其中运行插件测试
+
+    Args:
+        version (str): 对应的 Python 版本
+        environment (dict[str, str]): 容器环境变量
+        time_limit (float): 容器最长运行时间，单位为秒
+        check (bool): 容器异常退出时是否抛出 ContainerError
+        partial (bool): 超时时是否返回已经输出的内容
+
+    Returns:
+        bytes | None: 容器的标准输出，超时且未设置 partial 时返回 None
+    """
+    image_name = DOCKER_IMAGES.format(version)
+    environment = {
+        # 插件测试需要用到的插件列表来验证插件依赖是否正确加载
+        "PLUGINS_URL": get_plugins_url(),
+        "PLUGIN_TEST_INSTALLER": PLUGIN_TEST_INSTALLER,
+        **environment,
+    }
+
+    # 在空闲容器中运行的命令超时后无法获取已经输出的内容，所以需要时不使用容器池
+    container = None if partial else await container_pool.claim(version)
+    if container is not None:
+        return await exec_container(
+            container, image_name, environment, time_limit, check
+        )
+
+    # 连接 Docker 环境
+    client = docker.DockerClient(base_url="unix://var/run/docker.sock")
+
+    # Docker SDK 的接口都是同步的，需要放到线程中运行，避免阻塞事件循环
+    container = await start_container(
+        asyncio.create_task(
+            asyncio.to_thread(
+                client.containers.run,
+                image_name,
+                environment=environment,
+                volumes=get_volumes(),
+                detach=True,
+                **get_resource_limits(),
+            )
+        )
+    )
+    try:
+        try:
+            # 容器内运行的命令拥有各自的超时设限，这里的超时用于兜底
+            status = await asyncio.wait_for(
+                asyncio.to_thread(container.wait), time_limit
+            )
+        except TimeoutError:
+            if not partial:
+                return None
+            # 需要在移除容器之前读取日志
+            return await asyncio.to_thread(container.logs, stdout=True, stderr=False)
+
+        output = await asyncio.to_thread(container.logs, stdout=True, stderr=False)
+        if check and status["StatusCode"] != 0:
+            stderr = await asyncio.to_thread(container.logs, stdout=False, stderr=True)
+            raise ContainerError(
+                container,
+                status["StatusCode"],
+                None,
+                image_name,
+                stderr.decode(errors="replace"),
+            )
+    finally:
+        # 无论是正常结束、超时还是被取消，都需要移除容器
+        # 强制移除会同时终止仍在运行的容器
+        await asyncio.to_thread(container.remove, force=True)
+
+    return output
+
+
+async def exec_container(
+    container: Container,
+    image_name: str,
+    environment: dict[str, str],
+    time_limit: float,
+    check: bool = True,
+) -> bytes | None:
+    """在空闲容器中运行插件测试并返回标准输出
+
+    参数与返回值同 run_container
+    """
+    command = ["python", "plugin_test.py"]
+    try:
+        try:
+            result = await asyncio.wait_for(
+                asyncio.to_thread(
+                    container.exec_run, command, environment=environment, demux=True
+                ),
+                time_limit,
+            )
+        except TimeoutError:
+            return None
+    finally:
+        # 测试过插件的容器环境已经改变，不能再次使用
+        await asyncio.to_thread(container.remove, force=True)
+
+    # 使用 demux 时分别返回标准输出与标准错误
+    assert isinstance(result.output, tuple)
+    stdout, stderr = result.output
+    # 命令运行结束后才会返回，没有退出码时同样视为异常退出
+    if check and result.exit_code != 0:
+        raise ContainerError(
+            container,
+            result.exit_code if result.exit_code is not None else -1,
+            command,
+            image_name,
+            stderr.decode(errors="replace") if stderr is not None else None,
+        )
+    return stdout or b""
+
+
 class DockerPluginTest:
     def __init__(self, project_link: str, module_name: str, config: str = ""):
         self.project_link = project_link
@@ -68,22 +350,111 @@ class DockerPluginTest:
         Returns:
             DockerTestResult: 测试结果
         """
-        image_name = DOCKER_IMAGES.format(version)
-        # 连接 Docker 环境
-        client = docker.DockerClient(base_url="unix://var/run/docker.sock")
+        output = await run_container(
+            version,
+            {"PLUGIN_INFO": self.key, "PLUGIN_CONFIG": self.config},
+            DOCKER_TEST_TIMEOUT,
+        )
+        if output is None:
+            return DockerTestResult(
+                run=False,
+                load=False,
+                config=self.config,
+                metadata=None,
+                outputs=[f"插件测试超时（{DOCKER_TEST_TIMEOUT} 秒），已终止测试容器"],
+            )
 
-        # 运行 Docker 容器，捕获输出。 容器内运行的代码拥有超时设限，此处无需设置超时
-        output = client.containers.run(
-            image_name,
-            environment={
-                "PLUGIN_INFO": self.key,
-                "PLUGIN_CONFIG": self.config,
-                # 插件测试需要用到的插件列表来验证插件依赖是否正确加载
-                "PLUGINS_URL": REGISTRY_PLUGINS_URL,
-            },
-            detach=False,
-            remove=True,
-        ).decode()
-
-        data = json.loads(output)
+        data = json.loads(output.decode())
         return DockerTestResult(**data)
+
+    async def run_matrix(
+        self, versions: list[str], early_exit: bool = True
+    ) -> dict[str, DockerTestResult]:
+        """同时在多个 Python 版本中测试插件
+
+        Args:
+            versions (list[str]): 对应的 Python 版本，第一个为主要版本
+            early_exit (bool): 主要版本插件安装失败时，是否取消其他版本的测试
+
+        Returns:
+            dict[str, DockerTestResult]: Python 版本与测试结果，按照传入的顺序排列
+        """
+        tasks = {
+            asyncio.create_task(self.run(version)): version for version in versions
+        }
+        results: dict[str, DockerTestResult] = {}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    version = tasks[task]
+                    try:
+                        results[version] = task.result()
+                    except Exception as err:
+                        # 只有主要版本的结果会作为插件的测试结果
+                        if version == versions[0]:
+                            raise
+                        results[version] = DockerTestResult(
+                            run=False,
+                            load=False,
+                            config=self.config,
+                            metadata=None,
+                            outputs=[f"插件测试出错：{err}"],
+                        )
+                # 主要版本插件安装失败时，其他版本大概率也无法安装
+                # 其他版本失败则可能只是不支持该版本，不影响主要版本的测试
+                if (
+                    early_exit
+                    and versions[0] in results
+                    and not results[versions[0]].run
+                ):
+                    break
+        finally:
+            # 取消的测试会在 run_container 中移除容器
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        return {version: results[version] for version in versions if version in results}
+
+
+class DockerBatchPluginTest:
+    """在同一个容器中依次测试多个插件
+
+    每个插件都在容器内各自的虚拟环境中测试，容器每测试完一个插件就输出一行结果
+    """
+
+    def __init__(self, tests: list[DockerPluginTest]):
+        self.tests = tests
+
+    async def run(self, version: str) -> dict[str, DockerTestResult]:
+        """运行 Docker 容器测试插件
+
+        容器异常退出或超时的时候，只返回已经完成测试的插件结果
+
+        Args:
+            version (str): 对应的 Python 版本
+
+        Returns:
+            dict[str, DockerTestResult]: 插件标识符与测试结果
+        """
+        batch = [{"key": test.key, "config": test.config} for test in self.tests]
+        output = await run_container(
+            version,
+            {"PLUGIN_BATCH": json.dumps(batch, ensure_ascii=False)},
+            DOCKER_TEST_TIMEOUT * len(self.tests),
+            check=False,
+            partial=True,
+        )
+        if output is None:
+            return {}
+
+        # 测试结果按照传入的顺序逐行输出
+        lines = [line for line in output.decode().splitlines() if line.startswith("{")]
+        return {
+            test.key: DockerTestResult(**json.loads(line))
+            for test, line in zip(self.tests, lines)
+        }
@@ -14,13 +14,18 @@ import asyncio
 import json
 import os
 import re
+import resource
+import shutil
 import sys
+import time
 from asyncio import create_subprocess_shell, subprocess
 from pathlib import Path
 from urllib.request import urlopen
 
 # NoneBot Store
 PLUGINS_URL = os.environ.get("PLUGINS_URL")
+# 安装插件所使用的工具，可选 poetry 或 uv
+PLUGIN_TEST_INSTALLER = os.environ.get("PLUGIN_TEST_INSTALLER") or "poetry"
 # 匹配信息的正则表达式
 ISSUE_PATTERN = r"### {}\s+([^\s#].*?)(?=(?:\s+###|$))"
 
@@ -142,6 +147,44 @@ else:
 """
 
 
+# 读取虚拟环境中已安装的包的信息
+PACKAGE_INFO_SCRIPT = """import json
+import re
+from importlib.metadata import PackageNotFoundError, distributions, version
+
+
+def canonicalize_name(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+try:
+    project_version = version("{}")
+except PackageNotFoundError:
+    project_version = None
+
+requirements = {{
+    canonicalize_name(dist.metadata["Name"]): dist.version for dist in distributions()
+}}
+print(json.dumps({{"version": project_version, "requirements": requirements}}))
+"""
+
+# 不同安装工具对应的命令
+INSTALLER_COMMANDS = {
+    "poetry": {
+        # 创建项目并安装插件
+        "create": """poetry init -n && sed -i "s/\\^/~/g" pyproject.toml && poetry env info --ansi && poetry add {project_link}""",
+        # 在虚拟环境中运行插件
+        "run": "poetry run python runner.py",
+    },
+    "uv": {
+        "create": "uv venv --python {python} && uv pip install {project_link}",
+        "run": ".venv/bin/python runner.py",
+    },
+}
+# 两种安装工具都会在项目目录下创建虚拟环境，直接使用其中的解释器读取包信息
+PACKAGE_INFO_COMMAND = ".venv/bin/python package_info.py"
+
+
 def strip_ansi(text: str | None) -> str:
     """去除 ANSI 转义字符"""
     if not text:
@@ -179,14 +222,9 @@ def canonicalize_name(name: str) -> str:
 
 
 def extract_version(output: str, project_link: str) -> str | None:
-    """提取插件版本"""
+    """从安装失败的输出中提取插件版本"""
     output = strip_ansi(output)
 
-    # 匹配 poetry show 的输出
-    match = re.search(r"version\s+:\s+(\S+)", output)
-    if match:
-        return match.group(1).strip()
-
     # poetry 使用 packaging.utils 中的 canonicalize_name 规范化名称
     # 在这里我们也需要规范化名称，以正确匹配版本号
     project_link = canonicalize_name(project_link)
@@ -203,14 +241,28 @@ def extract_version(output: str, project_link: str) -> str | None:
     if match:
         return match.group(1).strip()
 
+    # uv 版本解析失败的情况
+    match = re.search(rf"{project_link}==(\S+) depends on", output)
+    if match:
+        return match.group(1).strip()
+
+    # uv 构建插件失败的情况
+    match = re.search(
+        rf"Failed to (?:download and )?build `{project_link}==(\S+)`", output
+    )
+    if match:
+        return match.group(1).strip()
+
 
 def parse_requirements(requirements: str) -> dict[str, str]:
     """解析 requirements.txt 文件"""
     # anyio==3.6.2 ; python_version >= "3.11" and python_version < "4.0"
     # pydantic[dotenv]==1.10.6 ; python_version >= "3.10" and python_version < "4.0"
+    # uv pip freeze 的输出没有环境标记
+    # anyio==3.6.2
     results = {}
     for line in requirements.strip().splitlines():
-        match = re.match(r"^(.+?)(?:\[.+\])?==(.+) ;", line)
+        match = re.match(r"^(.+?)(?:\[.+\])?==([^\s;]+)", line.strip())
         if match:
             package_name = match.group(1)
             version = match.group(2)
@@ -219,22 +271,30 @@ def parse_requirements(requirements: str) -> dict[str, str]:
 
 
 class PluginTest:
-    def __init__(self, project_info: str, config: str | None = None) -> None:
+    def __init__(
+        self,
+        project_info: str,
+        config: str | None = None,
+        installer: str = PLUGIN_TEST_INSTALLER,
+    ) -> None:
         """插件测试构造函数
 
         Args:
             project_info (str): 项目信息，格式为 project_link:module_name
             config (str | None, optional): 插件配置. 默认为 None.
+            installer (str, optional): 安装插件所使用的工具. 默认为 poetry.
         """
         self.project_link = project_info.split(":")[0]
         self.module_name = project_info.split(":")[1]
         self.config = config
+        self.installer = installer
         self._version = None
         self._plugin_list = None
 
         self._create = False
         self._run = False
         self._deps = []
+        self._requirements = {}
 
         self._lines_output = []
 
@@ -271,14 +331,27 @@ class PluginTest:
         env["POETRY_VIRTUALENVS_IN_PROJECT"] = "true"
         # https://python-poetry.org/docs/configuration/#virtualenvsprefer-active-python-experimental
         env["POETRY_VIRTUALENVS_PREFER_ACTIVE_PYTHON"] = "true"
+        # uv 配置
+        # 缓存目录挂载在其他文件系统上时无法使用硬链接
+        # https://docs.astral.sh/uv/reference/settings/#link-mode
+        env["UV_LINK_MODE"] = "copy"
         return env
 
+    def installer_command(self, name: str) -> str:
+        """获取当前安装工具对应的命令"""
+        return INSTALLER_COMMANDS[self.installer][name].format(
+            project_link=self.project_link, python=sys.executable
+        )
+
     def _log_output(self, msg: str):
         # print(msg)
         self._lines_output.append(msg)
 
     async def run(self):
         """插件测试入口"""
+        start_time = time.perf_counter()
+        # 批量测试时需要减去之前插件的资源占用
+        start_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
 
         # 创建测试目录
         if not self._test_dir.exists():
@@ -287,10 +360,7 @@ class PluginTest:
         # 创建插件测试项目
         await self.create_poetry_project()
         if self._create:
-            await asyncio.gather(
-                self.show_package_info(),
-                self.show_plugin_dependencies(),
-            )
+            await self.show_package_info()
             await self.run_poetry_project()
 
         metadata = None
@@ -307,11 +377,42 @@ class PluginTest:
             "version": self._version,
             "config": self.config,
             "test_env": " ".join(self._test_env),
+            "dependencies": self._deps,
+            "requirements": self._requirements,
+            **self._resource_usage(start_usage),
+            "duration": round(time.perf_counter() - start_time, 3),
+            "install_size": self._install_size(),
         }
         # 输出测试结果
         print(json.dumps(result, ensure_ascii=False))
         return result
 
+    def _install_size(self) -> int | None:
+        """插件安装后虚拟环境的大小，单位为字节"""
+        venv_path = self.path / ".venv"
+        if not venv_path.exists():
+            return None
+        return sum(
+            path.lstat().st_size
+            for path in venv_path.rglob("*")
+            if path.is_file() and not path.is_symlink()
+        )
+
+    def _resource_usage(self, start_usage: resource.struct_rusage) -> dict:
+        """测试时子进程的资源占用
+
+        ru_maxrss 为所有已结束子进程中的最大值，批量测试时会包含之前测试的插件
+        只有测试期间峰值变大时，才能确定峰值来自当前插件，否则峰值内存为 None
+        """
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu_time = (usage.ru_utime + usage.ru_stime) - (
+            start_usage.ru_utime + start_usage.ru_stime
+        )
+        peak_memory = (
+            usage.ru_maxrss if usage.ru_maxrss > start_usage.ru_maxrss else None
+        )
+        return {"peak_memory": peak_memory, "cpu_time": round(cpu_time, 3)}
+
     async def command(self, cmd: str, timeout: int = 300) -> tuple[bool, str, str]:
         """执行命令
 
@@ -346,13 +447,11 @@ class PluginTest:
         return not code, stdout.decode(), stderr.decode()
 
     async def create_poetry_project(self):
-        """创建 poetry 项目用来测试插件"""
+        """创建项目用来测试插件"""
         if not self.path.exists():
             self.path.mkdir()
 
-            code, stdout, stderr = await self.command(
-                f"""poetry init -n && sed -i "s/\\^/~/g" pyproject.toml && poetry env info --ansi && poetry add {self.project_link}"""
-            )
+            code, stdout, stderr = await self.command(self.installer_command("create"))
 
             self._create = code
 
@@ -371,21 +470,37 @@ class PluginTest:
             self._create = True
 
     async def show_package_info(self) -> None:
-        """获取插件的版本与插件信息"""
+        """获取插件的版本与依赖
+
+        直接在虚拟环境中通过 importlib.metadata 读取已安装的包的信息
+        """
         if self.path.exists():
-            code, stdout, stderr = await self.command(
-                f"poetry show {self.project_link}"
-            )
-            if code:
-                # 获取插件版本
-                self._version = extract_version(stdout, self.project_link)
+            # 去除 extras，只保留包名
+            package_name = re.sub(r"\[.*\]$", "", self.project_link)
+            with open(self.path / "package_info.py", "w", encoding="utf-8") as f:
+                f.write(PACKAGE_INFO_SCRIPT.format(package_name))
 
-                # 记录插件信息至输出
-                self._log_output(f"插件 {self.project_link} 的信息如下：")
-                self._std_output(stdout)
-            else:
+            code, stdout, stderr = await self.command(PACKAGE_INFO_COMMAND)
+
+            try:
+                data = json.loads(stdout) if code else None
+            except json.JSONDecodeError:
+                data = None
+
+            if data is None:
                 self._log_output(f"插件 {self.project_link} 信息获取失败。")
                 self._std_output(stdout, stderr)
+                return
+
+            self._version = data["version"]
+            requirements: dict[str, str] = data["requirements"]
+            self._requirements = requirements
+            self._deps = self._get_deps(requirements)
+            self._test_env = self._get_test_env(requirements)
+
+            self._log_output(f"插件 {self.project_link} 的版本为 {self._version}。")
+            self._log_output(f"插件 {self.project_link} 依赖的插件如下：")
+            self._log_output(f"    {', '.join(self._deps)}")
 
     async def run_poetry_project(self) -> None:
         """运行插件"""
@@ -410,7 +525,7 @@ class PluginTest:
                 )
 
             code, stdout, stderr = await self.command(
-                "poetry run python runner.py", timeout=600
+                self.installer_command("run"), timeout=600
             )
 
             self._run = code
@@ -422,21 +537,6 @@ class PluginTest:
                 self._log_output(f"插件 {self.module_name} 加载出错：")
                 self._std_output(stdout, stderr)
 
-    async def show_plugin_dependencies(self) -> None:
-        """获取插件的依赖"""
-        if self.path.exists():
-            code, stdout, stderr = await self.command("poetry export --without-hashes")
-
-            if code:
-                self._log_output(f"插件 {self.project_link} 依赖的插件如下：")
-                requirements = parse_requirements(stdout)
-                self._deps = self._get_deps(requirements)
-                self._test_env = self._get_test_env(requirements)
-                self._log_output(f"    {', '.join(self._deps)}")
-            else:
-                self._log_output(f"插件 {self.project_link} 依赖获取失败。")
-                self._std_output(stdout, stderr)
-
     @property
     def plugin_list(self) -> dict[str, str]:
         """获取插件列表"""
@@ -482,12 +582,53 @@ class PluginTest:
         return envs
 
 
+async def run_batch(batch: list[dict[str, str | None]]):
+    """依次测试多个插件
+
+    每个插件都有各自的测试目录与虚拟环境，测试完一个插件就输出一行结果并删除测试目录
+    """
+    plugin_list = None
+    for item in batch:
+        plugin = PluginTest(item["key"] or "", item.get("config"))
+        # 插件列表只需要获取一次
+        plugin._plugin_list = plugin_list
+        try:
+            await plugin.run()
+        except Exception as e:
+            # 单个插件出错时不影响后续插件的测试
+            print(
+                json.dumps(
+                    {
+                        "metadata": None,
+                        "outputs": [f"插件测试出错：{e}"],
+                        "load": False,
+                        "run": False,
+                        "version": None,
+                        "config": item.get("config"),
+                    },
+                    ensure_ascii=False,
+                )
+            )
+        plugin_list = plugin._plugin_list
+        sys.stdout.flush()
+        # 测试完成后删除插件的测试目录与虚拟环境，避免占满磁盘空间
+        shutil.rmtree(plugin.path, ignore_errors=True)
+
+
 def main():
     """根据传入的环境变量进行测试
 
     PLUGIN_INFO 即为该插件的 KEY
     PLUGIN_CONFIG 即为该插件的配置
+    PLUGIN_TEST_INSTALLER 即为安装插件所使用的工具
+
+    如果传入了 PLUGIN_BATCH，则依次测试其中的所有插件
+    格式为 [{"key": "project_link:module_name", "config": "..."}]
     """
+    plugin_batch = os.environ.get("PLUGIN_BATCH")
+    if plugin_batch:
+        asyncio.run(run_batch(json.loads(plugin_batch)))
+        return
 
     plugin_info = os.environ.get("PLUGIN_INFO", "")
     plugin_config = os.environ.get("PLUGIN_CONFIG", None)
@@ -336,6 +336,24 @@ class StoreTestResult(BaseModel):
     """
     results: dict[Literal["validation", "load", "metadata"], bool]
     outputs: dict[Literal["validation", "load", "metadata"], Any]
+    duration: float | None = None
+    """测试耗时，单位为秒
+
+    用于估计下次测试所需的时间
+    """
+    install_size: int | None = None
+    """插件安装后虚拟环境的大小，单位为字节"""
+    dependencies: list[str] | None = None
+    """插件依赖的商店插件的模块名
+
+    依赖的插件发布新版本时，需要重新测试该插件
+    """
+    env_hash: str | None = None
+    """测试环境的哈希值
+
+    由插件版本、解析出的依赖版本、Python 版本与插件配置计算得到
+    插件版本相同但依赖发生变化时，需要重新测试该插件
+    """
 
     @classmethod
     def from_info(cls, info: PluginPublishInfo) -> Self:
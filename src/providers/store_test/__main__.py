@@ -1,13 +1,24 @@
 import asyncio
 import os
+from collections.abc import Coroutine
+from typing import Any, Literal
 
 import click
 
 from src.providers.models import RegistryUpdatePayload
+from src.providers.utils import close_async_client
 
 from .store import StoreTest
 
 
+async def run_with_client[T](coro: Coroutine[Any, Any, T]) -> T:
+    """运行协程，并在结束后关闭当前事件循环的 HTTP 客户端"""
+    try:
+        return await coro
+    finally:
+        await close_async_client()
+
+
 @click.group()
 @click.option("--debug/--no-debug", default=False)
 def cli(debug: bool):
@@ -25,8 +36,9 @@ def registry_update():
 
     payload = RegistryUpdatePayload.model_validate_json(payload)
 
+    # 只需要下载与更新类型相关的数据，不用提前下载全部数据
     test = StoreTest()
-    asyncio.run(test.registry_update(payload))
+    asyncio.run(run_with_client(test.registry_update(payload)))
 
 
 @cli.command()
@@ -34,16 +46,67 @@ def registry_update():
 @click.option("-o", "--offset", default=0, show_default=True, help="测试插件偏移量")
 @click.option("-f", "--force", default=False, is_flag=True, help="强制重新测试")
 @click.option("-k", "--key", default=None, show_default=True, help="测试插件标识符")
-def plugin_test(limit: int, offset: int, force: bool, key: str | None):
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="同时测试插件数量",
+)
+@click.option(
+    "-r",
+    "--resume",
+    default=False,
+    is_flag=True,
+    help="从上次中断的地方继续测试",
+)
+@click.option(
+    "-b",
+    "--batch-size",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="每个容器中测试的插件数量",
+)
+@click.option(
+    "--budget",
+    default=None,
+    type=click.FloatRange(min=0, min_open=True),
+    help="测试时间预算（分钟），设置后按照历史耗时选择插件，不再限制测试数量",
+)
+@click.option(
+    "-s",
+    "--strategy",
+    default="store",
+    show_default=True,
+    type=click.Choice(["store", "priority"]),
+    help="选择测试插件的方式：store 按商店顺序测试有新版本的插件，priority 优先测试最有可能改变结果的插件",
+)
+def plugin_test(
+    limit: int,
+    offset: int,
+    force: bool,
+    key: str | None,
+    jobs: int,
+    resume: bool,
+    batch_size: int,
+    budget: float | None,
+    strategy: Literal["store", "priority"],
+):
     """插件测试"""
     from .store import StoreTest
 
-    test = StoreTest()
+    async def main():
+        test = await StoreTest.load()
+        if key:
+            await test.run_single_plugin(key, force)
+        else:
+            await test.run(
+                limit, offset, force, jobs, resume, batch_size, budget, strategy
+            )
 
-    if key:
-        asyncio.run(test.run_single_plugin(key, force))
-    else:
-        asyncio.run(test.run(limit, offset, force))
+    asyncio.run(run_with_client(main()))
 
 
 if __name__ == "__main__":
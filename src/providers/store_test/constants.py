@@ -1,3 +1,4 @@
+from datetime import timedelta
 from pathlib import Path
 
 TEST_DIR = Path("plugin_test")
@@ -23,3 +24,30 @@ PLUGINS_PATH = TEST_DIR / "plugins.json"
 
 PLUGIN_CONFIG_PATH = TEST_DIR / "plugin_configs.json"
 """ 生成的插件配置保存路径 """
+
+DEPENDENTS_PATH = TEST_DIR / "dependents.json"
+""" 插件被哪些插件依赖的保存路径 """
+
+RETESTS_PATH = TEST_DIR / "retests.json"
+""" 因为达到测试上限而没有重新测试的插件保存路径，下次测试时继续重新测试 """
+
+JOURNAL_PATH = TEST_DIR / "journal.jsonl"
+""" 测试进度保存路径，每测试完一个插件就追加一行 """
+
+AUTHORS_PATH = TEST_DIR / "authors.json"
+""" 作者 ID 与用户名对应关系的缓存路径 """
+
+AUTHOR_REFRESH_INTERVAL = timedelta(days=7)
+""" 作者用户名的刷新间隔 """
+
+AUTHOR_CONCURRENCY = 8
+""" 同时获取作者用户名的最大请求数 """
+
+RESOLVE_CONCURRENCY = 8
+""" 同时解析插件依赖的最大进程数 """
+
+RESOLVE_TIMEOUT = 120
+""" 解析插件依赖的超时时间，单位为秒 """
+
+DEFAULT_TEST_DURATION = 300
+""" 没有历史记录时估计的插件测试耗时，单位为秒 """
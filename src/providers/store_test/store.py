@@ -1,7 +1,19 @@
+import asyncio
+import json
+from collections import deque
+from collections.abc import Collection, Iterable
+from datetime import datetime
+from functools import cached_property
+from typing import Any, Literal, Self, TypedDict, overload
+from zoneinfo import ZoneInfo
+
 import click
+from pydantic_core import to_jsonable_python
 
 from src.providers.constants import (
     BOT_KEY_TEMPLATE,
+    PLUGIN_TEST_INSTALLER,
+    PLUGIN_TEST_PYTHON_VERSIONS,
     PYPI_KEY_TEMPLATE,
     REGISTRY_ADAPTERS_URL,
     REGISTRY_BOTS_URL,
@@ -14,101 +26,264 @@ from src.providers.constants import (
     STORE_DRIVERS_URL,
     STORE_PLUGINS_URL,
 )
+from src.providers.docker_test import (
+    DockerBatchPluginTest,
+    DockerPluginTest,
+    DockerTestResult,
+)
 from src.providers.models import (
     RegistryAdapter,
     RegistryBot,
     RegistryDriver,
+    RegistryModels,
     RegistryPlugin,
     RegistryUpdatePayload,
     StoreAdapter,
     StoreBot,
     StoreDriver,
+    StoreModels,
     StorePlugin,
     StoreTestResult,
 )
-from src.providers.utils import dump_json, get_latest_version, load_json_from_web
-from src.providers.validation.utils import get_author_name
+from src.providers.utils import (
+    dump_json,
+    dumps_json,
+    get_latest_version,
+    get_latest_versions,
+    load_json_from_file,
+    load_json_from_url,
+    load_json_from_url_async,
+)
+from src.providers.validation.utils import get_author_name_async
 
 from .constants import (
     ADAPTERS_PATH,
+    AUTHOR_CONCURRENCY,
+    AUTHOR_REFRESH_INTERVAL,
+    AUTHORS_PATH,
     BOTS_PATH,
+    DEFAULT_TEST_DURATION,
+    DEPENDENTS_PATH,
     DRIVERS_PATH,
+    JOURNAL_PATH,
     PLUGIN_CONFIG_PATH,
     PLUGINS_PATH,
+    RESOLVE_CONCURRENCY,
     RESULTS_PATH,
+    RETESTS_PATH,
 )
+from .utils import get_env_hash, is_synced, resolve_requirements
 from .validation import validate_plugin
 
+COLLECTION_URLS: dict[str, str] = {
+    "store_adapters": STORE_ADAPTERS_URL,
+    "store_bots": STORE_BOTS_URL,
+    "store_drivers": STORE_DRIVERS_URL,
+    "store_plugins": STORE_PLUGINS_URL,
+    "previous_results": REGISTRY_RESULTS_URL,
+    "previous_adapters": REGISTRY_ADAPTERS_URL,
+    "previous_bots": REGISTRY_BOTS_URL,
+    "previous_drivers": REGISTRY_DRIVERS_URL,
+    "previous_plugins": REGISTRY_PLUGINS_URL,
+    "plugin_configs": REGISTRY_PLUGIN_CONFIG_URL,
+}
+""" 商店测试需要的数据及其下载地址 """
+
+
+COLLECTION_MODELS: dict[str, type[StoreModels | RegistryModels]] = {
+    "store_adapters": StoreAdapter,
+    "store_bots": StoreBot,
+    "store_drivers": StoreDriver,
+    "store_plugins": StorePlugin,
+    "previous_adapters": RegistryAdapter,
+    "previous_bots": RegistryBot,
+    "previous_drivers": RegistryDriver,
+    "previous_plugins": RegistryPlugin,
+}
+""" 商店与仓库列表对应的模型 """
+
+
+def parse_collection(name: str, data: Any) -> Any:
+    """将下载的数据解析为以标识符为键的模型"""
+    if name == "previous_results":
+        return {key: StoreTestResult(**value) for key, value in data.items()}
+    if name not in COLLECTION_MODELS:
+        return data
+
+    model = COLLECTION_MODELS[name]
+    if model in (StoreBot, RegistryBot):
+        return {
+            BOT_KEY_TEMPLATE.format(
+                name=item["name"], homepage=item["homepage"]
+            ): model(**item)
+            for item in data
+        }
+    return {
+        PYPI_KEY_TEMPLATE.format(
+            project_link=item["project_link"], module_name=item["module_name"]
+        ): model(**item)
+        for item in data
+    }
+
+
+class CachedAuthor(TypedDict):
+    """缓存的作者信息"""
+
+    login: str
+    time: str | None
+    """ 获取时间，为 None 时表示从仓库数据中得到，并未实际请求过 """
+
+
+class LazyCollection[T]:
+    """第一次访问时才加载的商店与仓库数据"""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name.removeprefix("_")
+
+    @overload
+    def __get__(self, instance: None, owner: type) -> Self: ...
+
+    @overload
+    def __get__(self, instance: "StoreTest", owner: type) -> T: ...
+
+    def __get__(self, instance: "StoreTest | None", owner: type) -> "T | Self":
+        if instance is None:
+            return self
+        return instance.get_collection(self.name)
+
+    def __set__(self, instance: "StoreTest", value: T) -> None:
+        instance._data[self.name] = value
+
 
 class StoreTest:
     """商店测试"""
 
-    def __init__(self) -> None:
-        # 商店数据
-        self._store_adapters: dict[str, StoreAdapter] = {
-            PYPI_KEY_TEMPLATE.format(
-                project_link=adapter["project_link"],
-                module_name=adapter["module_name"],
-            ): StoreAdapter(**adapter)
-            for adapter in load_json_from_web(STORE_ADAPTERS_URL)
-        }
-        self._store_bots: dict[str, StoreBot] = {
-            BOT_KEY_TEMPLATE.format(
-                name=bot["name"],
-                homepage=bot["homepage"],
-            ): StoreBot(**bot)
-            for bot in load_json_from_web(STORE_BOTS_URL)
-        }
-        self._store_drivers: dict[str, StoreDriver] = {
-            PYPI_KEY_TEMPLATE.format(
-                project_link=driver["project_link"],
-                module_name=driver["module_name"],
-            ): StoreDriver(**driver)
-            for driver in load_json_from_web(STORE_DRIVERS_URL)
-        }
-        self._store_plugins: dict[str, StorePlugin] = {
-            PYPI_KEY_TEMPLATE.format(
-                project_link=plugin["project_link"],
-                module_name=plugin["module_name"],
-            ): StorePlugin(**plugin)
-            for plugin in load_json_from_web(STORE_PLUGINS_URL)
-        }
-        # 上次测试的结果
-        self._previous_results: dict[str, StoreTestResult] = {
-            key: StoreTestResult(**value)
-            for key, value in load_json_from_web(REGISTRY_RESULTS_URL).items()
-        }
-        self._previous_adapters: dict[str, RegistryAdapter] = {
-            PYPI_KEY_TEMPLATE.format(
-                project_link=adapter["project_link"],
-                module_name=adapter["module_name"],
-            ): RegistryAdapter(**adapter)
-            for adapter in load_json_from_web(REGISTRY_ADAPTERS_URL)
-        }
-        self._previous_bots: dict[str, RegistryBot] = {
-            BOT_KEY_TEMPLATE.format(
-                name=bot["name"],
-                homepage=bot["homepage"],
-            ): RegistryBot(**bot)
-            for bot in load_json_from_web(url=REGISTRY_BOTS_URL)
-        }
-        self._previous_drivers: dict[str, RegistryDriver] = {
-            PYPI_KEY_TEMPLATE.format(
-                project_link=driver["project_link"],
-                module_name=driver["module_name"],
-            ): RegistryDriver(**driver)
-            for driver in load_json_from_web(REGISTRY_DRIVERS_URL)
-        }
-        self._previous_plugins: dict[str, RegistryPlugin] = {
-            PYPI_KEY_TEMPLATE.format(
-                project_link=plugin["project_link"], module_name=plugin["module_name"]
-            ): RegistryPlugin(**plugin)
-            for plugin in load_json_from_web(REGISTRY_PLUGINS_URL)
-        }
-        # 插件配置文件
-        self._plugin_configs: dict[str, str] = load_json_from_web(
-            REGISTRY_PLUGIN_CONFIG_URL
-        )
+    # 商店数据
+    _store_adapters = LazyCollection[dict[str, StoreAdapter]]()
+    _store_bots = LazyCollection[dict[str, StoreBot]]()
+    _store_drivers = LazyCollection[dict[str, StoreDriver]]()
+    _store_plugins = LazyCollection[dict[str, StorePlugin]]()
+    # 上次测试的结果
+    _previous_results = LazyCollection[dict[str, StoreTestResult]]()
+    _previous_adapters = LazyCollection[dict[str, RegistryAdapter]]()
+    _previous_bots = LazyCollection[dict[str, RegistryBot]]()
+    _previous_drivers = LazyCollection[dict[str, RegistryDriver]]()
+    _previous_plugins = LazyCollection[dict[str, RegistryPlugin]]()
+    # 插件配置文件
+    _plugin_configs = LazyCollection[dict[str, str]]()
+
+    def __init__(self, data: dict[str, Any] | None = None) -> None:
+        """
+        Args:
+            data (dict[str, Any] | None): 已经解析好的商店与仓库数据，
+                其余数据在第一次使用时才会下载
+        """
+        # 已经加载的数据
+        self._data: dict[str, Any] = dict(data or {})
+        # 预先批量获取的插件最新版本号
+        self._latest_versions: dict[str, str | ValueError] = {}
+        # 发生变化需要保存的数据
+        self._changed: set[str] = set()
+        # 因为依赖的插件有新版本而需要重新测试的插件
+        self._retest: dict[str, str] = {}
+        # 在本地解析依赖后计算出的测试环境哈希值
+        self._env_hashes: dict[str, str] = {}
+
+    @classmethod
+    async def load(cls, names: Iterable[str] = COLLECTION_URLS) -> Self:
+        """并发下载商店与仓库数据
+
+        每个文件下载完成后立即解析，不用等待其他文件
+
+        Args:
+            names (Iterable[str]): 需要提前下载的数据，默认为全部数据
+        """
+
+        async def fetch(name: str) -> tuple[str, Any]:
+            data = await load_json_from_url_async(COLLECTION_URLS[name])
+            return name, parse_collection(name, data)
+
+        return cls(dict(await asyncio.gather(*(fetch(name) for name in names))))
+
+    def get_collection(self, name: str) -> Any:
+        """获取数据，如果还没有加载则下载并解析"""
+        if name not in self._data:
+            self._data[name] = parse_collection(
+                name, load_json_from_url(COLLECTION_URLS[name])
+            )
+        return self._data[name]
+
+    def is_loaded(self, name: str) -> bool:
+        """数据是否已经加载"""
+        return name in self._data
+
+    @cached_property
+    def _authors(self) -> dict[int, CachedAuthor]:
+        """作者 ID 与用户名的对应关系"""
+        return self.load_authors()
+
+    def load_authors(self) -> dict[int, CachedAuthor]:
+        """加载作者 ID 与用户名的对应关系
+
+        商店与仓库中都存在的条目，可以直接使用仓库中的作者名
+        再使用上次运行时保存的缓存覆盖
+        """
+        authors: dict[int, CachedAuthor] = {}
+        for store, registry in (
+            (self._store_adapters, self._previous_adapters),
+            (self._store_bots, self._previous_bots),
+            (self._store_drivers, self._previous_drivers),
+            (self._store_plugins, self._previous_plugins),
+        ):
+            for key, item in store.items():
+                if key in registry:
+                    authors[item.author_id] = {
+                        "login": registry[key].author,
+                        "time": None,
+                    }
+
+        if AUTHORS_PATH.exists():
+            for author_id, author in load_json_from_file(AUTHORS_PATH).items():
+                authors[int(author_id)] = author
+        return authors
+
+    async def resolve_author_names(
+        self, author_ids: Iterable[int], refresh: bool = True
+    ) -> dict[int, str]:
+        """批量获取作者用户名
+
+        refresh 为 True 时会重新获取超过刷新间隔的用户名，否则只获取缺失的用户名
+        获取失败时使用缓存中的数据，没有缓存的作者不会出现在结果中
+        """
+        now = datetime.now(ZoneInfo("Asia/Shanghai"))
+        author_ids = set(author_ids)
+
+        def should_fetch(author_id: int) -> bool:
+            author = self._authors.get(author_id)
+            if author is None:
+                return True
+            if not refresh:
+                return False
+            return (
+                author["time"] is None
+                or now - datetime.fromisoformat(author["time"])
+                > AUTHOR_REFRESH_INTERVAL
+            )
+
+        semaphore = asyncio.Semaphore(AUTHOR_CONCURRENCY)
+
+        async def worker(author_id: int):
+            async with semaphore:
+                try:
+                    login = await get_author_name_async(author_id)
+                except Exception as e:
+                    click.echo(f"获取作者 {author_id} 的用户名失败：{e}")
+                    return
+            self._authors[author_id] = {"login": login, "time": now.isoformat()}
+            self._changed.add("authors")
+
+        await asyncio.gather(*(worker(i) for i in author_ids if should_fetch(i)))
+        return {i: self._authors[i]["login"] for i in author_ids if i in self._authors}
 
     def should_skip(self, key: str, force: bool = False) -> bool:
         """是否跳过测试"""
@@ -120,6 +295,11 @@ class StoreTest:
         if force:
             return False
 
+        # 依赖的插件有新版本，需要重新测试
+        if key in self._retest:
+            click.echo(f"插件 {key} 依赖的插件 {self._retest[key]} 有新版本，重新测试")
+            return False
+
         # 如果插件不在上次测试的结果中，则不跳过
         previous_result: StoreTestResult | None = self._previous_results.get(key)
         previous_plugin: RegistryPlugin | None = self._previous_plugins.get(key)
@@ -128,14 +308,153 @@ class StoreTest:
 
         # 如果插件为最新版本，则跳过测试
         try:
-            latest_version = get_latest_version(previous_plugin.project_link)
+            latest_version = self.get_latest_version(previous_plugin.project_link)
         except ValueError as e:
             click.echo(f"插件 {key} 获取最新版本失败：{e}，跳过测试")
             return True
-        if latest_version == previous_result.version:
-            click.echo(f"插件 {key} 为最新版本（{latest_version}），跳过测试")
-            return True
-        return False
+        if latest_version != previous_result.version:
+            return False
+
+        # 版本相同时还需要比较测试环境，无法得到测试环境时只比较版本
+        if self.env_changed(key):
+            click.echo(f"插件 {key} 的依赖有更新，重新测试")
+            return False
+        click.echo(f"插件 {key} 为最新版本（{latest_version}），跳过测试")
+        return True
+
+    def env_changed(self, key: str) -> bool:
+        """插件的测试环境是否与上次测试时不同
+
+        无法得到测试环境时视为没有变化
+        """
+        env_hash = self._env_hashes.get(key)
+        previous_result = self._previous_results.get(key)
+        return (
+            env_hash is not None
+            and previous_result is not None
+            and previous_result.env_hash is not None
+            and env_hash != previous_result.env_hash
+        )
+
+    def get_dependents(self) -> dict[str, list[str]]:
+        """获取依赖关系图
+
+        键为插件标识符，值为依赖该插件的插件标识符
+        只根据测试结果构建，不需要下载商店数据
+        """
+        # 插件标识符为 project_link:module_name
+        keys = {key.rsplit(":", 1)[-1]: key for key in self._previous_results}
+        dependents: dict[str, list[str]] = {}
+        for key, result in self._previous_results.items():
+            for module_name in result.dependencies or []:
+                if module_name in keys:
+                    dependents.setdefault(keys[module_name], []).append(key)
+        return dependents
+
+    def find_retests(self, keys: Iterable[str]) -> dict[str, str]:
+        """找出依赖的插件有新版本的插件
+
+        返回需要重新测试的插件标识符与其依赖的有新版本的插件标识符
+        """
+        dependents = self.get_dependents()
+        retests: dict[str, str] = {}
+        for key in keys:
+            previous_result = self._previous_results.get(key)
+            previous_plugin = self._previous_plugins.get(key)
+            if (
+                key not in dependents
+                or previous_result is None
+                or previous_plugin is None
+            ):
+                continue
+            try:
+                latest_version = self.get_latest_version(previous_plugin.project_link)
+            except ValueError:
+                continue
+            if latest_version != previous_result.version:
+                for dependent in dependents[key]:
+                    retests.setdefault(dependent, key)
+        return retests
+
+    def load_retests(self) -> dict[str, str]:
+        """读取上次因为达到测试上限而没有重新测试的插件
+
+        依赖的插件测试过新版本之后，就无法再从测试结果中发现需要重新测试
+        """
+        if not RETESTS_PATH.exists():
+            return {}
+        return {
+            key: dependency
+            for key, dependency in load_json_from_file(RETESTS_PATH).items()
+            if key in self._store_plugins
+        }
+
+    def get_latest_version(self, project_link: str) -> str:
+        """获取插件的最新版本号
+
+        优先使用预先获取的版本号，不存在时再请求 PyPI
+        """
+        if project_link not in self._latest_versions:
+            return get_latest_version(project_link)
+
+        latest_version = self._latest_versions[project_link]
+        if isinstance(latest_version, ValueError):
+            raise latest_version
+        return latest_version
+
+    async def prefetch_latest_versions(self, keys: list[str]):
+        """批量获取插件的最新版本号
+
+        只有存在上次测试结果的插件才需要通过版本号判断是否跳过测试
+        """
+        project_links = [
+            self._previous_plugins[key].project_link
+            for key in keys
+            if not key.startswith("git+http")
+            and key in self._previous_results
+            and key in self._previous_plugins
+        ]
+        self._latest_versions.update(await get_latest_versions(project_links))
+
+    async def prefetch_env_hashes(self, keys: Iterable[str]):
+        """批量在本地解析插件依赖，并计算测试环境的哈希值
+
+        只有版本没有变化且上次记录了测试环境的插件才需要比较
+        """
+        # 本地使用 uv 解析依赖，只有测试时也使用 uv 安装插件，解析的结果才会一致
+        if PLUGIN_TEST_INSTALLER != "uv":
+            return
+
+        python_version = PLUGIN_TEST_PYTHON_VERSIONS[0]
+        semaphore = asyncio.Semaphore(RESOLVE_CONCURRENCY)
+
+        async def worker(key: str):
+            async with semaphore:
+                requirements = await resolve_requirements(
+                    self._previous_plugins[key].project_link, python_version
+                )
+            if requirements is None:
+                return
+            self._env_hashes[key] = get_env_hash(
+                self._previous_results[key].version,
+                requirements,
+                python_version,
+                self._plugin_configs.get(key) or "",
+            )
+
+        def should_resolve(key: str) -> bool:
+            previous_result = self._previous_results.get(key)
+            previous_plugin = self._previous_plugins.get(key)
+            return (
+                previous_result is not None
+                and previous_result.env_hash is not None
+                and previous_plugin is not None
+                and not key.startswith("git+http")
+                and self._latest_versions.get(previous_plugin.project_link)
+                == previous_result.version
+            )
+
+        await asyncio.gather(*(worker(key) for key in keys if should_resolve(key)))
 
     def read_plugin_config(self, key: str) -> str:
         """获取插件配置
@@ -148,61 +467,285 @@ class StoreTest:
         if self._plugin_configs.get(key) is not None:
             return self._plugin_configs[key]
         self._plugin_configs[key] = ""
+        self._changed.add("plugin_configs")
         return ""
 
-    async def test_plugin(self, key: str) -> tuple[StoreTestResult, RegistryPlugin]:
+    async def test_plugin(
+        self, key: str, plugin_test_result: DockerTestResult | None = None
+    ) -> tuple[StoreTestResult, RegistryPlugin]:
         """测试插件
 
         Args:
             key (str): 插件标识符
-            config (str | None): 插件配置，若为 None 则从上次测试结果中获取
-            plugin_data (str): 插件数据，不为 None 时，直接使用该数据且跳过测试
+            plugin_test_result (DockerTestResult | None): 批量测试得到的插件测试结果，
+                若为 None 则单独运行插件测试
         """
         plugin = self._store_plugins[key]
         config = self.read_plugin_config(key)
+        authors = await self.resolve_author_names([plugin.author_id])
         new_result, new_plugin = await validate_plugin(
             store_plugin=plugin,
             config=config,
             previous_plugin=self._previous_plugins.get(key),
+            author_name=authors.get(plugin.author_id),
+            plugin_test_result=plugin_test_result,
         )
         return new_result, new_plugin
 
-    async def test_plugins(self, limit: int, offset: int, force: bool):
+    async def batch_test_plugins(self, keys: list[str]) -> dict[str, DockerTestResult]:
+        """在同一个容器中测试多个插件
+
+        批量测试失败时返回空字典，之后会单独测试这些插件
+        """
+        tests = [
+            DockerPluginTest(
+                self._store_plugins[key].project_link,
+                self._store_plugins[key].module_name,
+                self.read_plugin_config(key),
+            )
+            for key in keys
+        ]
+        try:
+            return await DockerBatchPluginTest(tests).run(
+                PLUGIN_TEST_PYTHON_VERSIONS[0]
+            )
+        except Exception as err:
+            click.echo(f"批量测试插件失败：{err}")
+            return {}
+
+    def load_journal(
+        self,
+    ) -> tuple[dict[str, StoreTestResult], dict[str, RegistryPlugin]]:
+        """读取测试进度
+
+        中断时最后一行可能没有写完整，直接忽略无法解析的行
+        """
+        results: dict[str, StoreTestResult] = {}
+        plugins: dict[str, RegistryPlugin] = {}
+        if not JOURNAL_PATH.exists():
+            return results, plugins
+
+        with open(JOURNAL_PATH, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    data = json.loads(line)
+                    key = data["key"]
+                    results[key] = StoreTestResult(**data["result"])
+                    plugins[key] = RegistryPlugin(**data["plugin"])
+                except Exception:
+                    continue
+        return results, plugins
+
+    def write_journal(self, key: str, result: StoreTestResult, plugin: RegistryPlugin):
+        """保存单个插件的测试结果，用于中断后恢复测试"""
+        line = dumps_json(
+            to_jsonable_python({"key": key, "result": result, "plugin": plugin})
+        )
+        with open(JOURNAL_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    async def test_plugins(
+        self,
+        limit: int,
+        offset: int,
+        force: bool,
+        jobs: int = 1,
+        finished: Collection[str] = (),
+        batch_size: int = 1,
+        budget: float | None = None,
+        strategy: Literal["store", "priority"] = "store",
+    ) -> tuple[dict[str, StoreTestResult], dict[str, RegistryPlugin]]:
         """批量测试插件
 
         Args:
             limit (int): 至多有效测试插件数量
             offset (int): 测试插件偏移量
             force (bool): 是否强制测试
+            jobs (int): 同时测试的插件数量
+            finished (Collection[str]): 本轮已经测试完成的插件，会计入测试数量
+            batch_size (int): 每个容器中测试的插件数量
+            budget (float | None): 测试时间预算，单位为分钟，设置后不再限制测试数量
+            strategy (Literal["store", "priority"]): 选择测试插件的方式
+                store 按照商店中的顺序测试有新版本的插件
+                priority 优先测试最有可能改变测试结果的插件
         """
         new_results: dict[str, StoreTestResult] = {}
         new_plugins: dict[str, RegistryPlugin] = {}
-        i = 1
-        test_plugins = list(self._store_plugins.keys())[offset:]
+        keys = [
+            key
+            for key in list(self._store_plugins.keys())[offset:]
+            if key not in finished
+        ]
+        if not force:
+            # 同时获取依赖插件的最新版本号，避免检查依赖时逐个请求 PyPI
+            dependencies = [key for key in self.get_dependents() if key not in keys]
+            await self.prefetch_latest_versions(keys + dependencies)
+            await self.prefetch_env_hashes(keys)
+            # 依赖的插件不一定在这次测试的范围内，需要检查所有插件
+            self._retest = self.load_retests() | self.find_retests(self._store_plugins)
+            for key in finished:
+                self._retest.pop(key, None)
+            # 测试结束后保存还没有重新测试的插件
+            self._changed.add("retests")
+
+        # 正在测试与已经测试成功的插件数量
+        count = len(finished)
+
+        # 并行测试或者设置了时间预算时，需要提前确定测试哪些插件
+        scheduled = jobs > 1 or budget is not None or strategy == "priority"
+        if scheduled:
+            if strategy == "priority":
+                candidates = self.prioritize_plugins(keys)
+            else:
+                candidates = [key for key in keys if not self.should_skip(key, force)]
+            keys = self.schedule_plugins(candidates, limit - count, jobs, budget)
+            if budget is not None:
+                limit = count + len(keys)
+
+        # 所有 worker 共享同一个队列，保证每个插件只会被测试一次
+        # 达到上限后不再取出插件，测试失败时剩下的插件还能补上
+        pending = deque(keys)
+
+        def next_batch() -> list[str]:
+            """取出下一批需要测试的插件"""
+            nonlocal count
+            batch: list[str] = []
+            while pending and count < limit:
+                key = pending.popleft()
+
+                # 是否需要跳过测试
+                if not scheduled and self.should_skip(key, force):
+                    continue
+
+                count += 1
+                click.echo(f"{count}/{limit} 正在测试插件 {key} ...")
+                batch.append(key)
+                if len(batch) >= batch_size or count >= limit:
+                    break
+            return batch
+
+        async def worker():
+            nonlocal count
+            while batch := next_batch():
+                plugin_test_results = (
+                    await self.batch_test_plugins(batch) if len(batch) > 1 else {}
+                )
+                for key in batch:
+                    try:
+                        new_result, new_plugin = await self.test_plugin(
+                            key, plugin_test_results.get(key)
+                        )
+                    except Exception as err:
+                        # 测试失败的插件不计入测试数量
+                        count -= 1
+                        click.echo(err)
+                        continue
+
+                    new_results[key] = new_result
+                    new_plugins[key] = new_plugin
+                    self._retest.pop(key, None)
+                    try:
+                        self.write_journal(key, new_result, new_plugin)
+                    except Exception as err:
+                        # 测试进度只用于中断后恢复，保存失败不影响本轮测试
+                        click.echo(f"保存插件 {key} 的测试进度失败：{err}")
+
+        await asyncio.gather(*(worker() for _ in range(max(jobs, 1))))
+
+        # 还有插件没有测试，说明是因为达到了上限
+        if pending:
+            click.echo(f"已达到测试上限 {limit}，测试停止")
+
+        # 测试完成的顺序并不固定，按照商店中的顺序返回结果
+        return (
+            {
+                key: new_results[key]
+                for key in self._store_plugins
+                if key in new_results
+            },
+            {
+                key: new_plugins[key]
+                for key in self._store_plugins
+                if key in new_plugins
+            },
+        )
 
-        for key in test_plugins:
-            if i > limit:
-                click.echo(f"已达到测试上限 {limit}，测试停止")
-                break
+    def prioritize_plugins(self, keys: list[str]) -> list[str]:
+        """按照测试结果改变的可能性从高到低排列插件
 
-            # 是否需要跳过测试
-            if self.should_skip(key, force):
-                continue
+        依次考虑：
+        1. 从未测试过、PyPI 上有新版本、依赖的插件有新版本或者依赖有更新
+        2. 上次加载失败
+        3. 跳过测试的插件
+        4. 距离上次测试的时间更久
+        """
 
-            async def worker():
-                new_result, new_plugin = await self.test_plugin(key)
-                new_results[key] = new_result
-                new_plugins[key] = new_plugin
+        def priority(key: str) -> tuple[bool, bool, bool, float]:
+            previous_result = self._previous_results.get(key)
+            previous_plugin = self._previous_plugins.get(key)
+            if previous_result is None or previous_plugin is None:
+                return (False, False, False, 0)
 
             try:
-                click.echo(f"{i}/{limit} 正在测试插件 {key} ...")
-                await worker()  # TODO: 修改为并行
-                i += 1
-            except Exception as err:
-                click.echo(err)
-                continue
+                latest_version = self.get_latest_version(previous_plugin.project_link)
+                new_version = latest_version != previous_result.version
+            except ValueError:
+                new_version = False
+            changed = new_version or key in self._retest or self.env_changed(key)
+            try:
+                tested_at = datetime.fromisoformat(previous_result.time).timestamp()
+            except ValueError:
+                tested_at = 0
+            return (
+                not changed,
+                previous_result.results.get("load", False),
+                not previous_plugin.skip_test,
+                tested_at,
+            )
+
+        # Git 插件无法测试
+        keys = [key for key in keys if not key.startswith("git+http")]
+        return sorted(keys, key=priority)
+
+    def estimate_duration(self, key: str) -> float:
+        """根据上次的测试结果估计插件测试耗时，单位为秒"""
+        previous_result = self._previous_results.get(key)
+        if previous_result is None or previous_result.duration is None:
+            return DEFAULT_TEST_DURATION
+        return previous_result.duration
+
+    def schedule_plugins(
+        self, candidates: list[str], limit: int, jobs: int, budget: float | None
+    ) -> list[str]:
+        """安排插件的测试顺序
+
+        设置时间预算时，按照商店中的顺序选出预计能在预算内完成测试的插件
+        否则选出前 limit 个插件，剩下的插件用于补充测试失败的插件
+
+        选出的插件按照预计耗时从长到短排列，让并行测试尽量同时结束
 
-        return new_results, new_plugins
+        Args:
+            candidates (list[str]): 需要测试的插件
+            limit (int): 至多测试插件数量
+            jobs (int): 同时测试的插件数量
+            budget (float | None): 测试时间预算，单位为分钟
+        """
+        if budget is None:
+            selected, rest = candidates[:limit], candidates[limit:]
+        else:
+            # 并行测试时可以使用的总时间
+            capacity = budget * 60 * jobs
+            selected: list[str] = []
+            rest: list[str] = []
+            for key in candidates:
+                duration = self.estimate_duration(key)
+                if duration <= capacity:
+                    selected.append(key)
+                    capacity -= duration
+            click.echo(f"预计可以在 {budget} 分钟内测试 {len(selected)} 个插件")
+
+        selected.sort(key=self.estimate_duration, reverse=True)
+        return selected + rest
 
     def merge_plugin_data(
         self,
@@ -229,31 +772,96 @@ class StoreTest:
             elif key in self._previous_plugins:
                 plugins[key] = self._previous_plugins[key]
 
+        # 有新的数据，或者有插件已从商店中移除
+        if new_results or results.keys() != self._previous_results.keys():
+            self._changed.add("results")
+        if new_plugins or plugins.keys() != self._previous_plugins.keys():
+            self._changed.add("plugins")
+
         self._previous_results = results
         self._previous_plugins = plugins
 
     def dump_data(self):
-        """储存数据到仓库中"""
-        dump_json(ADAPTERS_PATH, list(self._previous_adapters.values()))
-        dump_json(BOTS_PATH, list(self._previous_bots.values()))
-        dump_json(DRIVERS_PATH, list(self._previous_drivers.values()))
-        dump_json(PLUGINS_PATH, list(self._previous_plugins.values()))
-        dump_json(RESULTS_PATH, self._previous_results)
-        # 插件配置不需要压缩
-        dump_json(PLUGIN_CONFIG_PATH, self._plugin_configs, False)
-
-    async def run(self, limit: int, offset: int = 0, force: bool = False):
+        """储存数据到仓库中
+
+        只保存发生变化的数据
+        """
+        # 只有加载过的数据才可能发生变化
+        if "adapters" in self._changed and self.is_loaded("previous_adapters"):
+            dump_json(ADAPTERS_PATH, list(self._previous_adapters.values()))
+        if "bots" in self._changed and self.is_loaded("previous_bots"):
+            dump_json(BOTS_PATH, list(self._previous_bots.values()))
+        if "drivers" in self._changed and self.is_loaded("previous_drivers"):
+            dump_json(DRIVERS_PATH, list(self._previous_drivers.values()))
+        if "plugins" in self._changed and self.is_loaded("previous_plugins"):
+            dump_json(PLUGINS_PATH, list(self._previous_plugins.values()))
+        if "results" in self._changed and self.is_loaded("previous_results"):
+            dump_json(RESULTS_PATH, self._previous_results)
+            dump_json(DEPENDENTS_PATH, self.get_dependents())
+        if "retests" in self._changed:
+            dump_json(RETESTS_PATH, self._retest)
+        if "plugin_configs" in self._changed and self.is_loaded("plugin_configs"):
+            # 插件配置不需要压缩
+            dump_json(PLUGIN_CONFIG_PATH, self._plugin_configs, False)
+        if "authors" in self._changed:
+            # 只需要保存实际请求过的作者用户名
+            dump_json(
+                AUTHORS_PATH,
+                {
+                    str(author_id): author
+                    for author_id, author in self._authors.items()
+                    if author["time"] is not None
+                },
+            )
+        self._changed.clear()
+
+    async def run(
+        self,
+        limit: int,
+        offset: int = 0,
+        force: bool = False,
+        jobs: int = 1,
+        resume: bool = False,
+        batch_size: int = 1,
+        budget: float | None = None,
+        strategy: Literal["store", "priority"] = "store",
+    ):
         """运行商店测试
 
         Args:
             limit (int): 至多有效测试插件数量
             offset (int): 测试插件偏移量
             force (bool): 是否强制测试，默认为 False
+            jobs (int): 同时测试的插件数量，默认为 1
+            resume (bool): 是否从上次中断的地方继续测试，默认为 False
+            batch_size (int): 每个容器中测试的插件数量，默认为 1
+            budget (float | None): 测试时间预算，单位为分钟，默认不限制
+            strategy (Literal["store", "priority"]): 选择测试插件的方式，默认为 store
         """
-        new_results, new_plugins = await self.test_plugins(limit, offset, force)
-        self.merge_plugin_data(new_results, new_plugins)
+        if resume:
+            finished_results, finished_plugins = self.load_journal()
+            click.echo(f"已恢复 {len(finished_results)} 个插件的测试结果")
+        else:
+            finished_results, finished_plugins = {}, {}
+            JOURNAL_PATH.unlink(missing_ok=True)
+
+        new_results, new_plugins = await self.test_plugins(
+            limit,
+            offset,
+            force,
+            jobs,
+            finished_results.keys(),
+            batch_size,
+            budget,
+            strategy,
+        )
+        self.merge_plugin_data(
+            finished_results | new_results, finished_plugins | new_plugins
+        )
         await self.sync_store()
         self.dump_data()
+        # 本轮测试已经完成，清除测试进度
+        JOURNAL_PATH.unlink(missing_ok=True)
 
     async def run_single_plugin(self, key: str, force: bool = False):
         """
@@ -287,18 +895,23 @@ class StoreTest:
             case RegistryAdapter():
                 if key not in self._previous_adapters:
                     self._previous_adapters[key] = payload.registry
+                    self._changed.add("adapters")
             case RegistryBot():
                 if key not in self._previous_bots:
                     self._previous_bots[key] = payload.registry
+                    self._changed.add("bots")
             case RegistryDriver():
                 if key not in self._previous_drivers:
                     self._previous_drivers[key] = payload.registry
+                    self._changed.add("drivers")
             case RegistryPlugin():
                 if key not in self._previous_plugins:
                     self._previous_plugins[key] = payload.registry
+                    self._changed.add("plugins")
                 if key not in self._previous_results and payload.result:
                     self._previous_results[key] = payload.result
                     self._plugin_configs[key] = payload.result.config
+                    self._changed.update(("results", "plugin_configs"))
 
         self.dump_data()
 
@@ -306,44 +919,78 @@ class StoreTest:
         """同步商店数据
 
         以商店数据为准，更新商店数据到仓库中，如果仓库中不存在则获取用户名后存储
+        与商店数据一致的条目直接沿用，不再重新构建
         """
+        # 批量获取新条目的作者用户名
+        authors = await self.resolve_author_names(
+            [
+                item.author_id
+                for store, registry in (
+                    (self._store_adapters, self._previous_adapters),
+                    (self._store_bots, self._previous_bots),
+                    (self._store_drivers, self._previous_drivers),
+                )
+                for key, item in store.items()
+                if key not in registry
+            ],
+            refresh=False,
+        )
+
         for key in self._store_adapters:
             if key not in self._previous_adapters:
-                author = get_author_name(self._store_adapters[key].author_id)
+                author = authors.get(self._store_adapters[key].author_id)
+                if author is None:
+                    click.echo(f"适配器 {key} 无法获取作者用户名，跳过同步")
+                    continue
                 self._previous_adapters[key] = RegistryAdapter(
                     **self._store_adapters[key].model_dump(), author=author
                 )
-            else:
+                self._changed.add("adapters")
+            elif not is_synced(self._store_adapters[key], self._previous_adapters[key]):
                 self._previous_adapters[key] = RegistryAdapter(
                     **self._store_adapters[key].model_dump(),
                     author=self._previous_adapters[key].author,
                 )
+                self._changed.add("adapters")
         for key in self._store_bots:
             if key not in self._previous_bots:
-                author = get_author_name(self._store_bots[key].author_id)
+                author = authors.get(self._store_bots[key].author_id)
+                if author is None:
+                    click.echo(f"机器人 {key} 无法获取作者用户名，跳过同步")
+                    continue
                 self._previous_bots[key] = RegistryBot(
                     **self._store_bots[key].model_dump(), author=author
                 )
-            else:
+                self._changed.add("bots")
+            elif not is_synced(self._store_bots[key], self._previous_bots[key]):
                 self._previous_bots[key] = RegistryBot(
                     **self._store_bots[key].model_dump(),
                     author=self._previous_bots[key].author,
                 )
+                self._changed.add("bots")
         for key in self._store_drivers:
             if key not in self._previous_drivers:
-                author = get_author_name(self._store_drivers[key].author_id)
+                author = authors.get(self._store_drivers[key].author_id)
+                if author is None:
+                    click.echo(f"驱动器 {key} 无法获取作者用户名，跳过同步")
+                    continue
                 self._previous_drivers[key] = RegistryDriver(
                     **self._store_drivers[key].model_dump(), author=author
                 )
-            else:
+                self._changed.add("drivers")
+            elif not is_synced(self._store_drivers[key], self._previous_drivers[key]):
                 self._previous_drivers[key] = RegistryDriver(
                     **self._store_drivers[key].model_dump(),
                     author=self._previous_drivers[key].author,
                 )
+                self._changed.add("drivers")
         for key in self._store_plugins:
-            if key in self._previous_plugins:
+            if key in self._previous_plugins and not is_synced(
+                self._store_plugins[key], self._previous_plugins[key]
+            ):
                 plugin_data = self._previous_plugins[key].model_dump()
                 # 更新插件数据，假设商店数据的数据没有问题的
                 # TODO: 如果 author_id 变化，应该重新获取 author
                 plugin_data.update(self._store_plugins[key].model_dump())
                 self._previous_plugins[key] = RegistryPlugin(**plugin_data)
+                self._changed.add("plugins")
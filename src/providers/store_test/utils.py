@@ -1,7 +1,99 @@
+import asyncio
+import hashlib
+import json
+
+from src.providers.docker_test.plugin_test import (
+    canonicalize_name,
+    parse_requirements,
+)
+from src.providers.models import RegistryModels, StoreModels
 from src.providers.utils import load_json_from_web
 
+from .constants import RESOLVE_TIMEOUT
+
+# 安装工具自带的包，是否存在取决于创建虚拟环境的方式，不影响插件的运行
+IGNORED_REQUIREMENTS = {"pip", "setuptools", "wheel"}
+
 
 def get_user_id(name: str) -> int:
     """获取用户信息"""
     data = load_json_from_web(f"https://api.github.com/users/{name}")
     return data["id"]
+
+
+def is_synced(store: StoreModels, registry: RegistryModels) -> bool:
+    """仓库中的数据是否已经与商店数据一致
+
+    仓库中只有作者名，所以不比较作者 ID
+    """
+    return all(
+        getattr(store, field) == getattr(registry, field)
+        for field in type(store).model_fields
+        if field != "author_id"
+    )
+
+
+def get_env_hash(
+    version: str | None,
+    requirements: dict[str, str],
+    python_version: str,
+    config: str,
+) -> str:
+    """计算测试环境的哈希值
+
+    包名统一规范化，Python 版本只保留主版本号与次版本号，与测试时指定的版本一致
+    """
+    data = {
+        "version": version,
+        "requirements": dict(
+            sorted(
+                (canonicalize_name(name), version)
+                for name, version in requirements.items()
+                if canonicalize_name(name) not in IGNORED_REQUIREMENTS
+            )
+        ),
+        "python": ".".join(python_version.split(".")[:2]),
+        "config": config,
+    }
+    return hashlib.sha256(
+        json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+async def resolve_requirements(
+    project_link: str, python_version: str
+) -> dict[str, str] | None:
+    """在本地解析插件的依赖，不实际安装
+
+    通过 uv pip compile 解析，解析失败或者没有安装 uv 时返回 None
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "uv",
+            "pip",
+            "compile",
+            "-",
+            "--python-version",
+            python_version,
+            "--no-header",
+            "--no-annotate",
+            "--quiet",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+    except OSError:
+        return None
+
+    try:
+        stdout, _ = await asyncio.wait_for(
+            process.communicate(project_link.encode()), RESOLVE_TIMEOUT
+        )
+    except TimeoutError:
+        process.kill()
+        await process.wait()
+        return None
+
+    if process.returncode != 0:
+        return None
+    return parse_requirements(stdout.decode())
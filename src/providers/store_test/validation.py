@@ -1,10 +1,12 @@
 """测试并验证插件"""
 
+import asyncio
 from typing import Any
 
 import click
 
-from src.providers.docker_test import DockerPluginTest
+from src.providers.constants import PLUGIN_TEST_INSTALLER, PLUGIN_TEST_PYTHON_VERSIONS
+from src.providers.docker_test import DockerPluginTest, DockerTestResult
 from src.providers.models import RegistryPlugin, StorePlugin, StoreTestResult
 from src.providers.validation import (
     PluginPublishInfo,
@@ -14,16 +16,24 @@ from src.providers.validation import (
 )
 from src.providers.validation.utils import get_author_name, get_upload_time
 
+from .utils import get_env_hash
+
 
 async def validate_plugin(
     store_plugin: StorePlugin,
     config: str,
     previous_plugin: RegistryPlugin | None = None,
+    author_name: str | None = None,
+    plugin_test_result: DockerTestResult | None = None,
 ):
     """验证插件
 
     如果 previous_plugin 为 None，说明是首次验证插件
 
+    如果 author_name 为 None，则通过 GitHub API 获取作者名称
+
+    如果 plugin_test_result 为 None，则运行插件测试，否则直接使用该测试结果
+
     返回测试结果与验证后的插件数据
 
     如果插件验证失败，返回的插件数据为 None
@@ -33,27 +43,87 @@ async def validate_plugin(
     module_name = store_plugin.module_name
 
     # 从 PyPI 获取信息
-    pypi_time = get_upload_time(project_link)
+    # 同步请求放到线程中运行，避免阻塞同时测试的其他插件
+    pypi_time = await asyncio.to_thread(get_upload_time, project_link)
+
+    # 第一个 Python 版本为主要版本，插件的加载结果、元数据与测试环境都以该版本为准
+    primary_version = PLUGIN_TEST_PYTHON_VERSIONS[0]
 
     # 测试插件
-    plugin_test_result = await DockerPluginTest(project_link, module_name, config).run(
-        "3.12"
-    )
+    if plugin_test_result is not None:
+        # 批量测试时只在主要版本中测试
+        plugin_test_results = {primary_version: plugin_test_result}
+    else:
+        plugin_test = DockerPluginTest(project_link, module_name, config)
+        if len(PLUGIN_TEST_PYTHON_VERSIONS) > 1:
+            plugin_test_results = await plugin_test.run_matrix(
+                PLUGIN_TEST_PYTHON_VERSIONS
+            )
+        else:
+            plugin_test_results = {
+                primary_version: await plugin_test.run(primary_version)
+            }
 
+    # 主要版本的测试不会被提前取消，所以一定有结果
+    plugin_test_result = plugin_test_results[primary_version]
     plugin_test_load = plugin_test_result.load
-    plugin_test_output = "\n".join(plugin_test_result.outputs)
+    if len(plugin_test_results) > 1:
+        plugin_test_outputs = [
+            line
+            for python_version, version_result in plugin_test_results.items()
+            for line in [f"Python {python_version}:", *version_result.outputs]
+        ]
+    else:
+        plugin_test_outputs = plugin_test_result.outputs
+    plugin_test_output = "\n".join(plugin_test_outputs)
     plugin_test_version = plugin_test_result.version
-    plugin_test_env = plugin_test_result.test_env
+    if len(plugin_test_results) > 1:
+        plugin_test_env: dict[str, bool] = {}
+        for python_version, version_result in plugin_test_results.items():
+            # 未能运行的测试没有记录测试环境，使用 Python 版本作为键，避免不同版本之间相互覆盖
+            env = (
+                version_result.test_env
+                if version_result.run
+                else f"python=={python_version}"
+            )
+            plugin_test_env[env] = version_result.load
+    else:
+        plugin_test_env = {plugin_test_result.test_env: True}
     plugin_metadata = plugin_test_result.metadata
+    # 商店测试时在本地使用 uv 解析依赖并计算哈希值
+    # 只有测试时也使用 uv 安装插件，两边解析出的依赖才会一致
+    plugin_test_env_hash = (
+        get_env_hash(
+            plugin_test_result.version,
+            plugin_test_result.requirements,
+            primary_version,
+            config,
+        )
+        if PLUGIN_TEST_INSTALLER == "uv" and plugin_test_result.requirements
+        else None
+    )
+    # 多个版本同时测试，耗时取决于最慢的版本
+    plugin_test_duration = max(
+        (
+            version_result.duration
+            for version_result in plugin_test_results.values()
+            if version_result.duration is not None
+        ),
+        default=None,
+    )
 
     # 输出插件测试相关信息
+    # 并行测试时需要一次性输出，避免与其他插件的输出交错
     click.echo(
-        f"插件 {project_link}({plugin_test_version}) 加载{'成功' if plugin_test_load else '失败'} {'插件已尝试加载' if plugin_test_result.run else '插件并未开始运行'}"
+        "\n".join(
+            [
+                f"插件 {project_link}({plugin_test_version}) 加载{'成功' if plugin_test_load else '失败'} {'插件已尝试加载' if plugin_test_result.run else '插件并未开始运行'}",
+                f"插件元数据：{plugin_metadata}",
+                "插件测试输出：",
+                *plugin_test_outputs,
+            ]
+        )
     )
-    click.echo(f"插件元数据：{plugin_metadata}")
-    click.echo("插件测试输出：")
-    for output in plugin_test_result.outputs:
-        click.echo(output)
 
     if previous_plugin is None:
         # 使用商店插件数据作为新的插件数据
@@ -83,18 +153,24 @@ async def validate_plugin(
         raw_data.update(plugin_metadata)
 
     # 通过 Github API 获取插件作者名称
-    try:
-        author_name = get_author_name(store_plugin.author_id)
-    except Exception:
-        # 若无法请求，试图从上次的插件数据中获取
-        author_name = previous_plugin.author if previous_plugin else ""
+    if author_name is None:
+        try:
+            author_name = await asyncio.to_thread(
+                get_author_name, store_plugin.author_id
+            )
+        except Exception:
+            # 若无法请求，试图从上次的插件数据中获取
+            author_name = previous_plugin.author if previous_plugin else ""
     raw_data["author"] = author_name
 
     # 更新插件信息
     raw_data["time"] = pypi_time
 
     # 验证插件信息
-    result: ValidationDict = validate_info(PublishType.PLUGIN, raw_data, [])
+    # 验证时需要请求插件主页，同样放到线程中运行
+    result: ValidationDict = await asyncio.to_thread(
+        validate_info, PublishType.PLUGIN, raw_data, []
+    )
 
     if result.valid:
         assert isinstance(result.info, PluginPublishInfo)
@@ -130,7 +206,11 @@ async def validate_plugin(
             "load": plugin_test_output,
             "metadata": plugin_metadata,
         },
-        test_env={plugin_test_env: True},
+        test_env=plugin_test_env,
+        duration=plugin_test_duration,
+        install_size=plugin_test_result.install_size,
+        dependencies=plugin_test_result.dependencies,
+        env_hash=plugin_test_env_hash,
     )
 
     return test_result, new_plugin
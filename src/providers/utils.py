@@ -1,11 +1,219 @@
+import asyncio
+import hashlib
 import json
+import mmap
+import os
+import re
+import time
+from collections.abc import Callable, Iterable
 from functools import cache
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 from typing import Any
+from urllib.parse import unquote, urlparse
+from weakref import WeakKeyDictionary
 
 import httpx
 import pyjson5
-from pydantic_core import to_jsonable_python
+from pydantic_core import to_json, to_jsonable_python
+
+from src.providers.constants import (
+    HTTP_CACHE_DIR,
+    HTTP_CACHE_MAX_SIZE,
+    HTTP_CACHE_TTL,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_TIMEOUT,
+    JSON_SERIALIZER,
+    LOCAL_MMAP_THRESHOLD,
+    PYPI_CONCURRENCY,
+)
+
+_async_clients: WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+    WeakKeyDictionary()
+)
+
+_cache_sizes: dict[Path, int] = {}
+"""各缓存目录的大小，避免每次写入缓存时都统计整个目录"""
+
+
+def _client_options() -> dict[str, Any]:
+    """HTTP 客户端的通用配置
+
+    PyPI 与 GitHub 都支持 HTTP/2，多个请求可以复用同一个连接
+    """
+    return {
+        "http2": True,
+        "timeout": HTTP_TIMEOUT,
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        ),
+    }
+
+
+@cache
+def get_client() -> httpx.Client:
+    """获取共享的 HTTP 客户端
+
+    同一进程内的请求复用连接，避免重复建立连接与 TLS 握手
+    """
+    return httpx.Client(**_client_options())
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """获取共享的异步 HTTP 客户端
+
+    异步客户端的连接与事件循环绑定，所以每个事件循环各自拥有一个客户端
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        _async_clients[loop] = httpx.AsyncClient(**_client_options())
+    return _async_clients[loop]
+
+
+async def close_async_client() -> None:
+    """关闭当前事件循环的异步 HTTP 客户端
+
+    需要在事件循环结束前调用，否则客户端的连接不会被正常关闭
+    """
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _cache_path(url: str) -> Path | None:
+    """网址对应的缓存文件路径，未启用缓存时返回 None"""
+    if not HTTP_CACHE_DIR:
+        return None
+    return Path(HTTP_CACHE_DIR) / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+
+def _read_cache(path: Path) -> dict[str, Any] | None:
+    """读取缓存，过期或损坏的缓存会被删除"""
+    try:
+        if time.time() - path.stat().st_mtime > HTTP_CACHE_TTL:
+            path.unlink(missing_ok=True)
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        path.unlink(missing_ok=True)
+        return None
+
+
+def _write_cache(path: Path, response: httpx.Response) -> None:
+    """写入缓存，并在超出容量时删除最久未使用的缓存"""
+    entry = {
+        "url": str(response.request.url),
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "content_type": response.headers.get("Content-Type"),
+        "text": response.text,
+    }
+    directory = path.parent
+    directory.mkdir(parents=True, exist_ok=True)
+    # 只在首次写入时统计目录大小，之后根据写入的文件累加
+    if directory not in _cache_sizes:
+        _cache_sizes[directory] = sum(
+            f.stat().st_size for f in directory.glob("*.json")
+        )
+    try:
+        old_size = path.stat().st_size
+    except FileNotFoundError:
+        old_size = 0
+
+    # 先写入临时文件再替换，避免并发读取到不完整的缓存
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+    tmp_path.replace(path)
+
+    _cache_sizes[directory] += path.stat().st_size - old_size
+    if _cache_sizes[directory] > HTTP_CACHE_MAX_SIZE:
+        _cache_sizes[directory] = _evict_cache(path)
+
+
+def _evict_cache(path: Path) -> int:
+    """删除最久未使用的缓存，返回剩余缓存的大小
+
+    清理到容量的四分之三，避免缓存接近上限时每次写入都要扫描目录
+    刚写入的缓存不会被删除
+    """
+    files = [(f, f.stat()) for f in path.parent.glob("*.json")]
+    total_size = sum(stat.st_size for _, stat in files)
+    for file, stat in sorted(files, key=lambda x: x[1].st_mtime):
+        if total_size <= HTTP_CACHE_MAX_SIZE * 3 // 4:
+            break
+        if file == path:
+            continue
+        file.unlink(missing_ok=True)
+        total_size -= stat.st_size
+    return total_size
+
+
+def _cache_request_headers(
+    url: str, headers: dict[str, str] | None
+) -> tuple[Path | None, dict[str, Any] | None, dict[str, str]]:
+    """根据缓存生成条件请求所需的请求头"""
+    headers = dict(headers or {})
+    path = _cache_path(url)
+    entry = _read_cache(path) if path else None
+    if entry:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return path, entry, headers
+
+
+def _cache_response(
+    path: Path | None, entry: dict[str, Any] | None, response: httpx.Response
+) -> httpx.Response:
+    """处理条件请求的响应
+
+    服务器返回 304 时使用缓存的内容，返回 200 且带有验证信息时更新缓存
+    """
+    if path is None:
+        return response
+
+    if response.status_code == 304 and entry:
+        # 更新修改时间，用于判断缓存是否过期与最近使用时间
+        path.touch()
+        return httpx.Response(
+            200,
+            headers={"Content-Type": entry["content_type"] or "application/json"},
+            text=entry["text"],
+            request=response.request,
+        )
+
+    if response.status_code == 200 and (
+        "ETag" in response.headers or "Last-Modified" in response.headers
+    ):
+        _write_cache(path, response)
+    return response
+
+
+def cached_get(
+    url: str, headers: dict[str, str] | None = None, follow_redirects: bool = False
+) -> httpx.Response:
+    """发送 GET 请求，并使用磁盘缓存
+
+    缓存以网址为键，需要设置 HTTP_CACHE_DIR 才会启用
+    """
+    path, entry, headers = _cache_request_headers(url, headers)
+    r = get_client().get(url, headers=headers, follow_redirects=follow_redirects)
+    return _cache_response(path, entry, r)
+
+
+async def cached_get_async(
+    url: str, headers: dict[str, str] | None = None, follow_redirects: bool = False
+) -> httpx.Response:
+    """发送异步 GET 请求，并使用磁盘缓存"""
+    path, entry, headers = _cache_request_headers(url, headers)
+    r = await get_async_client().get(
+        url, headers=headers, follow_redirects=follow_redirects
+    )
+    return _cache_response(path, entry, r)
 
 
 def load_json_from_file(file_path: Path):
@@ -14,12 +222,96 @@ def load_json_from_file(file_path: Path):
         return pyjson5.decode_io(file)  # type: ignore
 
 
+def is_json5(url: str, content_type: str | None = None) -> bool:
+    """是否需要按照 JSON5 格式解析
+
+    优先通过扩展名判断，其次为响应的内容类型
+    无法判断时按照 JSON5 解析，因为 JSON5 兼容 JSON
+    """
+    suffix = PurePosixPath(urlparse(url).path).suffix
+    if suffix == ".json5":
+        return True
+    if suffix == ".json":
+        return False
+    if content_type and content_type.split(";")[0].strip() == "application/json":
+        return False
+    return True
+
+
+def decode_json(data: bytes, json5: bool = True):
+    """解析 JSON 或 JSON5 数据
+
+    JSON 使用标准库解析，比 pyjson5 快得多
+    如果 JSON 实际上不符合标准，则再按照 JSON5 解析
+    """
+    if not json5:
+        try:
+            return json.loads(data)
+        except json.JSONDecodeError:
+            pass
+    return pyjson5.decode_buffer(data, wordlength=0)
+
+
 def load_json_from_web(url: str):
-    """从网络加载 JSON5 文件"""
-    r = httpx.get(url)
+    """从网络加载 JSON 或 JSON5 文件"""
+    r = get_client().get(url)
     if r.status_code != 200:
         raise ValueError(f"下载文件失败：{r.text}")
-    return pyjson5.decode(r.text)
+    return decode_json(r.content, is_json5(url, r.headers.get("Content-Type")))
+
+
+async def load_json_from_web_async(url: str):
+    """从网络异步加载 JSON 或 JSON5 文件"""
+    r = await get_async_client().get(url)
+    if r.status_code != 200:
+        raise ValueError(f"下载文件失败：{r.text}")
+    return decode_json(r.content, is_json5(url, r.headers.get("Content-Type")))
+
+
+def url_to_path(url: str) -> Path | None:
+    """将本地文件的网址转换为路径
+
+    支持 file:// 开头的网址与本地路径，其他网址返回 None
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "file":
+        return Path(unquote(parsed.path))
+    # Windows 路径的盘符会被识别为协议
+    if not parsed.scheme or len(parsed.scheme) == 1:
+        return Path(url)
+    return None
+
+
+def load_json_from_local(path: Path):
+    """从本地加载 JSON 或 JSON5 文件
+
+    较大的 JSON5 文件通过内存映射直接解析，不需要先读取为字符串
+    """
+    json5 = is_json5(path.as_posix())
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not json5 or size < LOCAL_MMAP_THRESHOLD:
+            return decode_json(f.read(), json5)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            # 类型标注只写了 bytes，实际支持任何实现了缓冲区协议的对象
+            return pyjson5.decode_buffer(buffer, wordlength=0)  # pyright: ignore[reportArgumentType]
+
+
+def load_json_from_url(url: str):
+    """加载 JSON 或 JSON5 文件
+
+    根据网址选择数据来源，本地文件直接读取，其他网址通过网络下载
+    """
+    if path := url_to_path(url):
+        return load_json_from_local(path)
+    return load_json_from_web(url)
+
+
+async def load_json_from_url_async(url: str):
+    """异步加载 JSON 或 JSON5 文件"""
+    if path := url_to_path(url):
+        return load_json_from_local(path)
+    return await load_json_from_web_async(url)
 
 
 def load_json(text: str):
@@ -27,25 +319,70 @@ def load_json(text: str):
     return pyjson5.decode(text)
 
 
+def _serialize_stdlib(data: Any, indent: int | None) -> bytes:
+    """先转换为 Python 对象，再使用标准库序列化"""
+    data = to_jsonable_python(data)
+    if indent is None:
+        # 为减少文件大小，还需手动设置 separators
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = json.dumps(data, ensure_ascii=False, indent=indent)
+    return text.encode()
+
+
+_exponent_regex = re.compile(rb"\d[eE][+-]?\d")
+_exponent_token_regex = re.compile(rb'"(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?[eE][+-]?\d+')
+
+
+def _format_exponent(match: re.Match[bytes]) -> bytes:
+    """按照标准库的格式输出科学计数法表示的浮点数，字符串保持不变"""
+    token = match.group()
+    if token.startswith(b'"'):
+        return token
+    return repr(float(token)).encode()
+
+
+def _serialize_pydantic(data: Any, indent: int | None) -> bytes:
+    """使用 pydantic_core 直接将对象序列化为字节
+
+    不会遍历两次对象，科学计数法表示的浮点数（如 1e16 与 1e+16）会按照标准库的格式重新输出
+    但模型字段中的 NaN 与 Infinity 仍会输出为 null，与标准库不同
+    """
+    output = to_json(data, indent=indent, inf_nan_mode="constants")
+    # 绝大部分数据中没有这样的浮点数，先粗略检查一遍，避免逐个匹配字符串
+    if _exponent_regex.search(output):
+        output = _exponent_token_regex.sub(_format_exponent, output)
+    return output
+
+
+JSON_SERIALIZERS: dict[str, Callable[[Any, int | None], bytes]] = {
+    "json": _serialize_stdlib,
+    "pydantic": _serialize_pydantic,
+}
+""" 可选的 JSON 序列化方式 """
+
+
+def serialize_json(data: Any, minify: bool = True) -> bytes:
+    """将对象序列化为 JSON 字节
+
+    通过 JSON_SERIALIZER 环境变量选择序列化方式
+    """
+    return JSON_SERIALIZERS[JSON_SERIALIZER](data, None if minify else 2)
+
+
 def dumps_json(data: Any, minify: bool = True) -> str:
     """格式化对象"""
-    if minify:
-        data = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
-    else:
-        data = json.dumps(data, ensure_ascii=False, indent=2)
-    return data
+    return serialize_json(data, minify).decode()
 
 
 def dump_json(path: Path, data: Any, minify: bool = True) -> None:
-    """保存 JSON 文件"""
-    data = to_jsonable_python(data)
+    """保存 JSON 文件
 
-    with open(path, "w", encoding="utf-8") as f:
-        if minify:
-            # 为减少文件大小，还需手动设置 separators
-            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
-        else:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    先写入临时文件再重命名，避免写入中断时留下不完整的文件
+    """
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_bytes(serialize_json(data, minify))
+    tmp_path.replace(path)
 
 
 def dump_json5(path: Path, data: Any) -> None:
@@ -65,15 +402,29 @@ def dump_json5(path: Path, data: Any) -> None:
         f.write(content)
 
 
+PYPI_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/83.0.4103.116 Safari/537.36"
+}
+
+
 @cache
 def get_pypi_data(project_link: str) -> dict[str, Any]:
     """获取 PyPI 数据"""
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/83.0.4103.116 Safari/537.36"
-    }
     url = f"https://pypi.org/pypi/{project_link}/json"
     try:
-        r = httpx.get(url, headers=headers)
+        r = cached_get(url, headers=PYPI_HEADERS)
+    except Exception as e:
+        raise ValueError(f"获取 PyPI 数据失败：{e}")
+    if r.status_code != 200:
+        raise ValueError(f"获取 PyPI 数据失败：{r.text}")
+    return load_json(r.text)
+
+
+async def get_pypi_data_async(project_link: str) -> dict[str, Any]:
+    """异步获取 PyPI 数据"""
+    url = f"https://pypi.org/pypi/{project_link}/json"
+    try:
+        r = await cached_get_async(url, headers=PYPI_HEADERS)
     except Exception as e:
         raise ValueError(f"获取 PyPI 数据失败：{e}")
     if r.status_code != 200:
@@ -87,6 +438,28 @@ def get_latest_version(project_link: str) -> str:
     return data["info"]["version"]
 
 
+async def get_latest_versions(
+    project_links: Iterable[str], concurrency: int = PYPI_CONCURRENCY
+) -> dict[str, str | ValueError]:
+    """批量获取插件的最新版本号
+
+    并发请求 PyPI，获取失败的插件对应的值为错误信息
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(project_link: str) -> str | ValueError:
+        async with semaphore:
+            try:
+                data = await get_pypi_data_async(project_link)
+            except ValueError as e:
+                return e
+        return data["info"]["version"]
+
+    project_links = list(dict.fromkeys(project_links))
+    versions = await asyncio.gather(*(worker(link) for link in project_links))
+    return dict(zip(project_links, versions, strict=True))
+
+
 def get_upload_time(project_link: str) -> str:
     """获取插件的上传时间"""
     data = get_pypi_data(project_link)
@@ -4,7 +4,13 @@ from typing import TYPE_CHECKING
 import httpx
 
 from src.providers.constants import STORE_ADAPTERS_URL
-from src.providers.utils import load_json, load_json_from_web
+from src.providers.utils import (
+    cached_get,
+    cached_get_async,
+    load_json,
+    load_json_from_url,
+    load_json_from_web,
+)
 
 from .constants import MESSAGE_TRANSLATIONS
 
@@ -15,7 +21,7 @@ if TYPE_CHECKING:
 @cache
 def get_url(url: str) -> httpx.Response:
     """获取网址"""
-    return httpx.get(url, follow_redirects=True)
+    return cached_get(url, follow_redirects=True)
 
 
 def get_pypi_name(project_link: str) -> str:
@@ -66,9 +72,21 @@ def get_author_name(author_id: int) -> str:
     return load_json_from_web(url)["login"]
 
 
+async def get_author_name_async(author_id: int) -> str:
+    """通过作者的ID异步获取作者名字
+
+    GitHub 对返回 304 的条件请求不计入速率限制，所以同样使用缓存
+    """
+    url = f"https://api.github.com/user/{author_id}"
+    r = await cached_get_async(url)
+    if r.status_code != 200:
+        raise ValueError(f"获取作者名字失败：{r.text}")
+    return load_json(r.text)["login"]
+
+
 def get_adapters() -> set[str]:
     """获取适配器列表"""
-    adapters = load_json_from_web(STORE_ADAPTERS_URL)
+    adapters = load_json_from_url(STORE_ADAPTERS_URL)
     return {adapter["module_name"] for adapter in adapters}
 
 
@@ -48,6 +48,9 @@ async def app(app: App, tmp_path: Path, mocker: MockerFixture):
     from src.plugins.github import plugin_config
     from src.providers.utils import dump_json5
 
+    # 测试时不预先启动测试容器
+    mocker.patch("src.providers.docker_test.container_pool.size", 0)
+
     adapter_path = tmp_path / "adapters.json5"
     dump_json5(
         adapter_path,
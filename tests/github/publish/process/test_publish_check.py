@@ -1017,6 +1017,7 @@ async def test_skip_plugin_check(
     mock_subprocess_run = mocker.patch(
         "subprocess.run", side_effect=lambda *args, **kwargs: mocker.MagicMock()
     )
+    mock_warm = mocker.patch("src.providers.docker_test.container_pool.warm")
 
     mock_issue = MockIssue(number=70, body=MockBody("plugin").generate()).as_mock(
         mocker
@@ -1200,6 +1201,8 @@ log_level=DEBUG
     check_json_data(plugin_config.input_config.plugin_path, [])
 
     assert mocked_api["project_link"].called
+    # 跳过测试时不需要启动测试容器
+    mock_warm.assert_not_called()
 
 
 async def test_convert_pull_request_to_draft(
@@ -124,6 +124,10 @@ async def test_process_pull_request(
                                     ],
                                 },
                             },
+                            "duration": None,
+                            "install_size": None,
+                            "dependencies": None,
+                            "env_hash": None,
                         },
                     },
                 }
@@ -321,6 +325,10 @@ async def test_process_pull_request_skip_plugin_test(
                                     ],
                                 },
                             },
+                            "duration": None,
+                            "install_size": None,
+                            "dependencies": None,
+                            "env_hash": None,
                         },
                     },
                 }
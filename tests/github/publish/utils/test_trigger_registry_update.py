@@ -104,6 +104,10 @@ async def test_trigger_registry_update(
                                     ],
                                 },
                             },
+                            "duration": None,
+                            "install_size": None,
+                            "dependencies": None,
+                            "env_hash": None,
                         },
                     },
                 }
@@ -202,6 +206,10 @@ async def test_trigger_registry_update_skip_test(
                                     ],
                                 },
                             },
+                            "duration": None,
+                            "install_size": None,
+                            "dependencies": None,
+                            "env_hash": None,
                         },
                     },
                 }
@@ -1,5 +1,8 @@
 import json
+import time
+from pathlib import Path
 
+import pytest
 from inline_snapshot import snapshot
 from pytest_mock import MockerFixture
 from respx import MockRouter
@@ -8,8 +11,9 @@ from respx import MockRouter
 async def test_docker_plugin_test(mocked_api: MockRouter, mocker: MockerFixture):
     from src.providers.docker_test import DockerPluginTest, DockerTestResult
 
-    mocked_run = mocker.Mock()
-    mocked_run.return_value = json.dumps(
+    mocked_container = mocker.Mock()
+    mocked_container.wait.return_value = {"StatusCode": 0}
+    mocked_container.logs.return_value = json.dumps(
         {
             "metadata": None,
             "outputs": ["test"],
@@ -20,6 +24,8 @@ async def test_docker_plugin_test(mocked_api: MockRouter, mocker: MockerFixture)
             "test_env": "python==3.12",
         }
     ).encode()
+    mocked_run = mocker.Mock()
+    mocked_run.return_value = mocked_container
     mocked_client = mocker.Mock()
     mocked_client.containers.run = mocked_run
     mocked_docker = mocker.patch("docker.DockerClient")
@@ -48,11 +54,14 @@ async def test_docker_plugin_test(mocked_api: MockRouter, mocker: MockerFixture)
                 "PLUGIN_INFO": "project_link:module_name",
                 "PLUGIN_CONFIG": "",
                 "PLUGINS_URL": "https://raw.githubusercontent.com/nonebot/registry/results/plugins.json",
+                "PLUGIN_TEST_INSTALLER": "poetry",
             }
         ),
-        detach=False,
-        remove=True,
+        volumes={"nonetest-cache": {"bind": "/root/.cache", "mode": "rw"}},
+        detach=True,
     )
+    mocked_container.logs.assert_called_once_with(stdout=True, stderr=False)
+    mocked_container.remove.assert_called_once_with(force=True)
 
 
 async def test_docker_plugin_test_metadata_some_fields_empty(
@@ -61,8 +70,9 @@ async def test_docker_plugin_test_metadata_some_fields_empty(
     """测试 metadata 的部分字段为空"""
     from src.providers.docker_test import DockerPluginTest, DockerTestResult
 
-    mocked_run = mocker.Mock()
-    mocked_run.return_value = json.dumps(
+    mocked_container = mocker.Mock()
+    mocked_container.wait.return_value = {"StatusCode": 0}
+    mocked_container.logs.return_value = json.dumps(
         {
             "metadata": {
                 "name": "name",
@@ -79,6 +89,8 @@ async def test_docker_plugin_test_metadata_some_fields_empty(
             "test_env": "python==3.12",
         }
     ).encode()
+    mocked_run = mocker.Mock()
+    mocked_run.return_value = mocked_container
     mocked_client = mocker.Mock()
     mocked_client.containers.run = mocked_run
     mocked_docker = mocker.patch("docker.DockerClient")
@@ -113,11 +125,14 @@ async def test_docker_plugin_test_metadata_some_fields_empty(
                 "PLUGIN_INFO": "project_link:module_name",
                 "PLUGIN_CONFIG": "",
                 "PLUGINS_URL": "https://raw.githubusercontent.com/nonebot/registry/results/plugins.json",
+                "PLUGIN_TEST_INSTALLER": "poetry",
             }
         ),
-        detach=False,
-        remove=True,
+        volumes={"nonetest-cache": {"bind": "/root/.cache", "mode": "rw"}},
+        detach=True,
     )
+    mocked_container.logs.assert_called_once_with(stdout=True, stderr=False)
+    mocked_container.remove.assert_called_once_with(force=True)
 
 
 async def test_docker_plugin_test_metadata_some_fields_invalid(
@@ -126,8 +141,9 @@ async def test_docker_plugin_test_metadata_some_fields_invalid(
     """测试 metadata 的部分字段不符合规范"""
     from src.providers.docker_test import DockerPluginTest, DockerTestResult, Metadata
 
-    mocked_run = mocker.Mock()
-    mocked_run.return_value = json.dumps(
+    mocked_container = mocker.Mock()
+    mocked_container.wait.return_value = {"StatusCode": 0}
+    mocked_container.logs.return_value = json.dumps(
         {
             "metadata": {
                 "name": "name",
@@ -144,6 +160,8 @@ async def test_docker_plugin_test_metadata_some_fields_invalid(
             "test_env": "python==3.12",
         }
     ).encode()
+    mocked_run = mocker.Mock()
+    mocked_run.return_value = mocked_container
     mocked_client = mocker.Mock()
     mocked_client.containers.run = mocked_run
     mocked_docker = mocker.patch("docker.DockerClient")
@@ -178,8 +196,510 @@ async def test_docker_plugin_test_metadata_some_fields_invalid(
                 "PLUGIN_INFO": "project_link:module_name",
                 "PLUGIN_CONFIG": "",
                 "PLUGINS_URL": "https://raw.githubusercontent.com/nonebot/registry/results/plugins.json",
+                "PLUGIN_TEST_INSTALLER": "poetry",
             }
         ),
-        detach=False,
-        remove=True,
+        volumes={"nonetest-cache": {"bind": "/root/.cache", "mode": "rw"}},
+        detach=True,
+    )
+    mocked_container.logs.assert_called_once_with(stdout=True, stderr=False)
+    mocked_container.remove.assert_called_once_with(force=True)
+
+
+async def test_docker_plugin_test_timeout(
+    mocked_api: MockRouter, mocker: MockerFixture
+):
+    """测试容器运行超时，需要终止并移除容器"""
+    from src.providers.docker_test import DockerPluginTest, DockerTestResult
+
+    mocker.patch("src.providers.docker_test.DOCKER_TEST_TIMEOUT", 0.1)
+
+    mocked_container = mocker.Mock()
+    mocked_container.wait.side_effect = lambda: time.sleep(1)
+    mocked_client = mocker.Mock()
+    mocked_client.containers.run.return_value = mocked_container
+    mocked_docker = mocker.patch("docker.DockerClient")
+    mocked_docker.return_value = mocked_client
+
+    test = DockerPluginTest("project_link", "module_name")
+    result = await test.run("3.12")
+
+    assert result == snapshot(
+        DockerTestResult(
+            config="",
+            load=False,
+            metadata=None,
+            outputs=["插件测试超时（0.1 秒），已终止测试容器"],
+            run=False,
+        )
+    )
+
+    mocked_container.logs.assert_not_called()
+    mocked_container.remove.assert_called_once_with(force=True)
+
+
+async def test_docker_plugin_test_cancel(mocked_api: MockRouter, mocker: MockerFixture):
+    """容器启动时测试被取消，需要等待容器启动完成后移除容器"""
+    import asyncio
+
+    from src.providers.docker_test import DockerPluginTest
+
+    mocked_container = mocker.Mock()
+    mocked_client = mocker.Mock()
+
+    def slow_run(*args, **kwargs):
+        time.sleep(0.2)
+        return mocked_container
+
+    mocked_client.containers.run.side_effect = slow_run
+    mocker.patch("docker.DockerClient", return_value=mocked_client)
+
+    task = asyncio.create_task(
+        DockerPluginTest("project_link", "module_name").run("3.12")
+    )
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    mocked_client.containers.run.assert_called_once()
+    mocked_container.wait.assert_not_called()
+    mocked_container.remove.assert_called_once_with(force=True)
+
+
+async def test_docker_plugin_test_exit_code(
+    mocked_api: MockRouter, mocker: MockerFixture
+):
+    """测试容器异常退出"""
+    from docker.errors import ContainerError
+
+    from src.providers.docker_test import DockerPluginTest
+
+    mocked_container = mocker.Mock()
+    mocked_container.wait.return_value = {"StatusCode": 1}
+    mocked_container.logs.return_value = b"error"
+    mocked_client = mocker.Mock()
+    mocked_client.containers.run.return_value = mocked_container
+    mocked_docker = mocker.patch("docker.DockerClient")
+    mocked_docker.return_value = mocked_client
+
+    test = DockerPluginTest("project_link", "module_name")
+    with pytest.raises(ContainerError) as exc_info:
+        await test.run("3.12")
+
+    assert exc_info.value.stderr == snapshot("error")
+
+    mocked_container.remove.assert_called_once_with(force=True)
+
+
+async def test_docker_plugin_test_without_cache_volume(
+    mocked_api: MockRouter, mocker: MockerFixture
+):
+    """缓存卷设置为空时不挂载"""
+    from src.providers.docker_test import DockerPluginTest
+
+    mocker.patch("src.providers.docker_test.DOCKER_CACHE_VOLUME", "")
+
+    mocked_container = mocker.Mock()
+    mocked_container.wait.return_value = {"StatusCode": 0}
+    mocked_container.logs.return_value = json.dumps(
+        {"run": True, "load": True, "metadata": None, "outputs": []}
+    ).encode()
+    mocked_client = mocker.Mock()
+    mocked_client.containers.run.return_value = mocked_container
+    mocked_docker = mocker.patch("docker.DockerClient")
+    mocked_docker.return_value = mocked_client
+
+    test = DockerPluginTest("project_link", "module_name")
+    await test.run("3.12")
+
+    assert mocked_client.containers.run.call_args.kwargs["volumes"] is None
+
+
+async def test_docker_plugin_test_local_registry(
+    mocked_api: MockRouter, mocker: MockerFixture, tmp_path: Path
+):
+    """仓库数据为本地文件时，将插件列表挂载到容器中"""
+    from src.providers.docker_test import DockerPluginTest, DockerTestResult
+
+    plugins_path = tmp_path / "plugins.json"
+    plugins_path.write_text("[]", encoding="utf-8")
+    mocker.patch(
+        "src.providers.docker_test.REGISTRY_PLUGINS_URL", plugins_path.as_uri()
+    )
+
+    mocked_container = mocker.Mock()
+    mocked_container.wait.return_value = {"StatusCode": 0}
+    mocked_container.logs.return_value = json.dumps(
+        {"run": True, "load": True, "metadata": None, "outputs": []}
+    ).encode()
+    mocked_client = mocker.Mock()
+    mocked_client.containers.run.return_value = mocked_container
+    mocked_docker = mocker.patch("docker.DockerClient")
+    mocked_docker.return_value = mocked_client
+
+    test = DockerPluginTest("project_link", "module_name")
+    result = await test.run("3.12")
+
+    assert result == snapshot(
+        DockerTestResult(run=True, load=True, metadata=None, outputs=[])
+    )
+    kwargs = mocked_client.containers.run.call_args.kwargs
+    assert kwargs["environment"]["PLUGINS_URL"] == snapshot("file:///tmp/plugins.json")
+    assert kwargs["volumes"] == {
+        "nonetest-cache": {"bind": "/root/.cache", "mode": "rw"},
+        str(plugins_path): {"bind": "/tmp/plugins.json", "mode": "ro"},
+    }
+
+
+async def test_docker_batch_plugin_test(mocked_api: MockRouter, mocker: MockerFixture):
+    """在同一个容器中测试多个插件
+
+    容器异常退出时只返回已经完成测试的插件结果
+    """
+    from src.providers.docker_test import (
+        DockerBatchPluginTest,
+        DockerPluginTest,
+        DockerTestResult,
+    )
+
+    mocked_container = mocker.Mock()
+    mocked_container.wait.return_value = {"StatusCode": 1}
+    mocked_container.logs.return_value = (
+        json.dumps(
+            {
+                "run": True,
+                "load": True,
+                "version": "1.0.0",
+                "metadata": None,
+                "outputs": [],
+            }
+        )
+        + "\n"
+    ).encode()
+    mocked_client = mocker.Mock()
+    mocked_client.containers.run.return_value = mocked_container
+    mocked_docker = mocker.patch("docker.DockerClient")
+    mocked_docker.return_value = mocked_client
+
+    test = DockerBatchPluginTest(
+        [
+            DockerPluginTest("project_link", "module_name", "a=1"),
+            DockerPluginTest("project_link2", "module_name2"),
+        ]
+    )
+    results = await test.run("3.12")
+
+    assert results == snapshot(
+        {
+            "project_link:module_name": DockerTestResult(
+                run=True, load=True, version="1.0.0", metadata=None, outputs=[]
+            )
+        }
+    )
+    environment = mocked_client.containers.run.call_args.kwargs["environment"]
+    assert json.loads(environment["PLUGIN_BATCH"]) == snapshot(
+        [
+            {"key": "project_link:module_name", "config": "a=1"},
+            {"key": "project_link2:module_name2", "config": ""},
+        ]
+    )
+    mocked_container.remove.assert_called_once_with(force=True)
+
+
+async def test_docker_batch_plugin_test_timeout(
+    mocked_api: MockRouter, mocker: MockerFixture
+):
+    """批量测试超时时，返回已经完成测试的插件结果"""
+    from src.providers.docker_test import (
+        DockerBatchPluginTest,
+        DockerPluginTest,
+        DockerTestResult,
+    )
+
+    mocker.patch("src.providers.docker_test.DOCKER_TEST_TIMEOUT", 0.05)
+
+    mocked_container = mocker.Mock()
+    mocked_container.wait.side_effect = lambda: time.sleep(1)
+    mocked_container.logs.return_value = (
+        json.dumps(
+            {
+                "run": True,
+                "load": True,
+                "version": "1.0.0",
+                "metadata": None,
+                "outputs": [],
+            }
+        )
+        + "\n"
+    ).encode()
+    mocked_client = mocker.Mock()
+    mocked_client.containers.run.return_value = mocked_container
+    mocked_docker = mocker.patch("docker.DockerClient")
+    mocked_docker.return_value = mocked_client
+    mocked_claim = mocker.patch("src.providers.docker_test.container_pool.claim")
+
+    test = DockerBatchPluginTest(
+        [
+            DockerPluginTest("project_link", "module_name"),
+            DockerPluginTest("project_link2", "module_name2"),
+        ]
+    )
+    results = await test.run("3.12")
+
+    assert results == snapshot(
+        {
+            "project_link:module_name": DockerTestResult(
+                run=True, load=True, version="1.0.0", metadata=None, outputs=[]
+            )
+        }
+    )
+    # 超时后先读取日志再移除容器
+    assert [call[0] for call in mocked_container.method_calls[-2:]] == snapshot(
+        ["logs", "remove"]
+    )
+    mocked_claim.assert_not_called()
+
+
+async def test_docker_plugin_test_container_pool(
+    mocked_api: MockRouter, mocker: MockerFixture
+):
+    """使用预先启动的容器测试插件
+
+    使用过的容器会被移除，不会自动补充新的容器
+    """
+    from src.providers.docker_test import (
+        ContainerPool,
+        DockerPluginTest,
+        DockerTestResult,
+    )
+
+    pool = ContainerPool(size=1)
+    mocker.patch("src.providers.docker_test.container_pool", pool)
+
+    mocked_container = mocker.Mock()
+    mocked_container.exec_run.return_value = mocker.Mock(
+        exit_code=0,
+        output=(
+            json.dumps(
+                {"run": True, "load": True, "metadata": None, "outputs": ["test"]}
+            ).encode(),
+            None,
+        ),
+    )
+    mocked_client = mocker.Mock()
+    mocked_client.containers.run.return_value = mocked_container
+    mocked_docker = mocker.patch("docker.DockerClient")
+    mocked_docker.return_value = mocked_client
+
+    pool.warm("3.12")
+    test = DockerPluginTest("project_link", "module_name")
+    result = await test.run("3.12")
+
+    assert result == snapshot(
+        DockerTestResult(run=True, load=True, metadata=None, outputs=["test"])
+    )
+    mocked_client.containers.run.assert_any_call(
+        "ghcr.io/nonebot/nonetest:3.12-latest",
+        command=["sleep", "infinity"],
+        volumes={"nonetest-cache": {"bind": "/root/.cache", "mode": "rw"}},
+        detach=True,
+    )
+    mocked_container.exec_run.assert_called_once_with(
+        ["python", "plugin_test.py"],
+        environment=snapshot(
+            {
+                "PLUGINS_URL": "https://raw.githubusercontent.com/nonebot/registry/results/plugins.json",
+                "PLUGIN_TEST_INSTALLER": "poetry",
+                "PLUGIN_INFO": "project_link:module_name",
+                "PLUGIN_CONFIG": "",
+            }
+        ),
+        demux=True,
+    )
+    mocked_container.remove.assert_called_once_with(force=True)
+
+    # 取走容器后池中没有空闲容器，退出时无需等待
+    await pool.close()
+    assert mocked_client.containers.run.call_count == 1
+    assert mocked_container.remove.call_count == 1
+
+
+async def test_docker_plugin_test_pool_exit_code(
+    mocked_api: MockRouter, mocker: MockerFixture
+):
+    """在预先启动的容器中测试插件，但是测试异常退出"""
+    from docker.errors import ContainerError
+
+    from src.providers.docker_test import ContainerPool, DockerPluginTest
+
+    pool = ContainerPool(size=1)
+    mocker.patch("src.providers.docker_test.container_pool", pool)
+
+    mocked_container = mocker.Mock()
+    mocked_container.exec_run.return_value = mocker.Mock(
+        exit_code=1, output=(None, b"error")
+    )
+    mocked_client = mocker.Mock()
+    mocked_client.containers.run.return_value = mocked_container
+    mocked_docker = mocker.patch("docker.DockerClient")
+    mocked_docker.return_value = mocked_client
+
+    pool.warm("3.12")
+    test = DockerPluginTest("project_link", "module_name")
+    with pytest.raises(ContainerError) as exc_info:
+        await test.run("3.12")
+
+    assert exc_info.value.exit_status == 1
+    assert exc_info.value.stderr == snapshot("error")
+    mocked_container.remove.assert_called_once_with(force=True)
+
+    await pool.close()
+
+
+async def test_docker_plugin_test_matrix(mocker: MockerFixture):
+    """同时在多个 Python 版本中测试插件
+
+    只有主要版本的插件安装失败时才取消其他版本的测试
+    """
+    import asyncio
+
+    from src.providers.docker_test import DockerPluginTest, DockerTestResult
+
+    cancelled: list[str] = []
+    failed_version = "3.11"
+
+    async def run(self, version: str):
+        try:
+            await asyncio.sleep({"3.10": 0.01, "3.11": 0, "3.12": 0.1}[version])
+        except asyncio.CancelledError:
+            cancelled.append(version)
+            raise
+        return DockerTestResult(
+            run=version != failed_version,
+            load=version != failed_version,
+            test_env=f"python=={version}",
+            metadata=None,
+            outputs=[],
+        )
+
+    mocker.patch.object(DockerPluginTest, "run", run)
+
+    test = DockerPluginTest("project_link", "module_name")
+
+    # 其他版本安装失败时继续测试
+    results = await test.run_matrix(["3.10", "3.11", "3.12"])
+
+    assert list(results) == snapshot(["3.10", "3.11", "3.12"])
+    assert cancelled == []
+
+    # 主要版本安装失败时取消其他版本的测试
+    failed_version = "3.10"
+    results = await test.run_matrix(["3.10", "3.11", "3.12"])
+
+    assert {version: result.test_env for version, result in results.items()} == (
+        snapshot({"3.10": "python==3.10", "3.11": "python==3.11"})
+    )
+    assert cancelled == ["3.12"]
+
+    results = await test.run_matrix(["3.10", "3.11", "3.12"], early_exit=False)
+
+    assert list(results) == snapshot(["3.10", "3.11", "3.12"])
+
+
+async def test_docker_plugin_test_matrix_raise(mocker: MockerFixture):
+    """同时在多个 Python 版本中测试插件，但是测试过程中报错
+
+    其他版本报错时记录为测试失败，主要版本报错时直接抛出
+    """
+    import asyncio
+
+    from src.providers.docker_test import DockerPluginTest, DockerTestResult
+
+    failed_version = "3.11"
+
+    async def run(self, version: str):
+        await asyncio.sleep({"3.10": 0.01, "3.11": 0, "3.12": 0}[version])
+        if version == failed_version:
+            raise Exception("容器启动失败")
+        return DockerTestResult(run=True, load=True, metadata=None, outputs=[])
+
+    mocker.patch.object(DockerPluginTest, "run", run)
+
+    test = DockerPluginTest("project_link", "module_name")
+
+    results = await test.run_matrix(["3.10", "3.11", "3.12"])
+
+    assert results == snapshot(
+        {
+            "3.10": DockerTestResult(run=True, load=True, metadata=None, outputs=[]),
+            "3.11": DockerTestResult(
+                run=False,
+                load=False,
+                metadata=None,
+                outputs=["插件测试出错：容器启动失败"],
+            ),
+            "3.12": DockerTestResult(run=True, load=True, metadata=None, outputs=[]),
+        }
+    )
+
+    failed_version = "3.10"
+    with pytest.raises(Exception, match="容器启动失败"):
+        await test.run_matrix(["3.10", "3.11", "3.12"])
+
+
+async def test_docker_plugin_test_resource_limits(
+    mocked_api: MockRouter, mocker: MockerFixture
+):
+    """限制测试容器的资源，并记录资源占用"""
+    from src.providers.docker_test import DockerPluginTest
+
+    mocker.patch("src.providers.docker_test.DOCKER_CPUS", 1.5)
+    mocker.patch("src.providers.docker_test.DOCKER_CPU_SHARES", 512)
+    mocker.patch("src.providers.docker_test.DOCKER_MEMORY_LIMIT", "2g")
+    mocker.patch("src.providers.docker_test.DOCKER_PIDS_LIMIT", 256)
+    mocker.patch("src.providers.docker_test.DOCKER_TMPFS_SIZE", "4g")
+
+    mocked_container = mocker.Mock()
+    mocked_container.wait.return_value = {"StatusCode": 0}
+    mocked_container.logs.return_value = json.dumps(
+        {
+            "run": True,
+            "load": True,
+            "metadata": None,
+            "outputs": [],
+            "peak_memory": 204800,
+            "cpu_time": 10.5,
+        }
+    ).encode()
+    mocked_client = mocker.Mock()
+    mocked_client.containers.run.return_value = mocked_container
+    mocked_docker = mocker.patch("docker.DockerClient")
+    mocked_docker.return_value = mocked_client
+
+    test = DockerPluginTest("project_link", "module_name")
+    result = await test.run("3.12")
+
+    assert result.peak_memory == 204800
+    assert result.cpu_time == 10.5
+    kwargs = mocked_client.containers.run.call_args.kwargs
+    assert {
+        key: kwargs[key]
+        for key in [
+            "nano_cpus",
+            "cpu_shares",
+            "mem_limit",
+            "memswap_limit",
+            "pids_limit",
+            "tmpfs",
+        ]
+    } == snapshot(
+        {
+            "nano_cpus": 1500000000,
+            "cpu_shares": 512,
+            "mem_limit": "2g",
+            "memswap_limit": "2g",
+            "pids_limit": 256,
+            "tmpfs": {"/tmp/plugin_test": "size=4g,exec"},
+        }
     )
@@ -1,33 +1,6 @@
 from pathlib import Path
 
 
-def test_extract_version(tmp_path: Path):
-    """poetry show 的输出"""
-    from src.providers.docker_test.plugin_test import extract_version
-
-    output = """
- name         : nonebot2
- version      : 2.0.1
- description  : An asynchronous python bot framework.
-
-dependencies
- - httpx >=0.20.0,<1.0.0
- - loguru >=0.6.0,<1.0.0
- - pydantic >=1.10.0,<2.0.0
- - pygtrie >=2.4.1,<3.0.0
- - tomli >=2.0.1,<3.0.0
- - typing-extensions >=4.0.0,<5.0.0
- - yarl >=1.7.2,<2.0.0
-
-required by
- - nonebot-adapter-github >=2.0.0-beta.5,<3.0.0
- - nonebug >=2.0.0-rc.2,<3.0.0
-"""
-
-    version = extract_version(output, "nonebot2")
-    assert version == "2.0.1"
-
-
 def test_extract_version_resolve_failed(tmp_path: Path):
     """版本解析失败的情况"""
     from src.providers.docker_test.plugin_test import extract_version
@@ -113,3 +86,33 @@ def test_extract_version_install_failed(tmp_path: Path):
     version = extract_version(output, "nonebot2")
 
     assert version is None
+
+
+def test_extract_version_uv_failed(tmp_path: Path):
+    """uv 安装插件失败的情况"""
+    from src.providers.docker_test.plugin_test import extract_version
+
+    output = """
+Using CPython 3.12.7 interpreter at: /usr/local/bin/python3
+Creating virtual environment at: .venv
+  × No solution found when resolving dependencies:
+  ╰─▶ Because the current Python version (3.12.7) does not satisfy Python>=3.12.8 and elf-rss==2.6.25 depends on Python>=3.12.8, we can conclude that elf-rss==2.6.25 cannot be used.
+"""
+
+    version = extract_version(output, "ELF-RSS")
+
+    assert version == "2.6.25"
+
+    output = """
+Resolved 32 packages in 1.21s
+  × Failed to build `nonebot-plugin-ncm==1.6.16`
+  ├─▶ The build backend returned an error
+"""
+
+    version = extract_version(output, "nonebot_plugin_ncm")
+
+    assert version == "1.6.16"
+
+    version = extract_version(output, "nonebot2")
+
+    assert version is None
@@ -1,6 +1,7 @@
 import json
 from pathlib import Path
 
+import pytest
 from inline_snapshot import snapshot
 from pytest_mock import MockerFixture
 
@@ -60,28 +61,21 @@ async def test_plugin_test(mocker: MockerFixture, tmp_path: Path):
     Writing lock file""",
                 "",
             )
-        if cmd == "poetry show project_link":
+        if cmd == ".venv/bin/python package_info.py":
             # show_package_info
             return (
                 True,
-                """
-    name         : nonebot-plugin-treehelp
-     version      : 0.5.0
-     description  : 适用于 Nonebot2 的树形帮助插件
-
-    dependencies
-     - nonebot2 >=2.2.0""",
-                "",
-            )
-        if cmd == "poetry export --without-hashes":
-            # show_plugin_dependencies
-            return (
-                True,
-                """
-nonebot2==2.4.0 ; python_version >= "3.9" and python_version < "4.0"
-pydantic-core==2.27.0 ; python_version >= "3.9" and python_version < "4.0"
-pydantic==2.10.0 ; python_version >= "3.9" and python_version < "4.0"
-                    """,
+                json.dumps(
+                    {
+                        "version": "0.5.0",
+                        "requirements": {
+                            "nonebot-plugin-treehelp": "0.5.0",
+                            "nonebot2": "2.4.0",
+                            "pydantic-core": "2.27.0",
+                            "pydantic": "2.10.0",
+                        },
+                    }
+                ),
                 "",
             )
         if cmd == "poetry run python runner.py":
@@ -112,6 +106,18 @@ pydantic==2.10.0 ; python_version >= "3.9" and python_version < "4.0"
     )
     mocked_get_plugin_list.return_value = {}
 
+    mocker.patch(
+        "src.providers.docker_test.plugin_test.resource.getrusage",
+        side_effect=[
+            mocker.Mock(ru_maxrss=1024, ru_utime=1.0, ru_stime=0.5),
+            mocker.Mock(ru_maxrss=204800, ru_utime=10.0, ru_stime=2.0),
+        ],
+    )
+    mocker.patch(
+        "src.providers.docker_test.plugin_test.time.perf_counter",
+        side_effect=[100.0, 112.5],
+    )
+
     result = await test.run()
     assert result == snapshot(
         {
@@ -162,13 +168,7 @@ pydantic==2.10.0 ; python_version >= "3.9" and python_version < "4.0"
                 "          - Installing nonebot-plugin-treehelp (0.5.0)",
                 "    ",
                 "        Writing lock file",
-                "插件 project_link 的信息如下：",
-                "    name         : nonebot-plugin-treehelp",
-                "         version      : 0.5.0",
-                "         description  : 适用于 Nonebot2 的树形帮助插件",
-                "    ",
-                "        dependencies",
-                "         - nonebot2 >=2.2.0",
+                "插件 project_link 的版本为 0.5.0。",
                 "插件 project_link 依赖的插件如下：",
                 "    ",
                 "插件 module_name 加载正常：",
@@ -178,8 +178,181 @@ pydantic==2.10.0 ; python_version >= "3.9" and python_version < "4.0"
             "version": "0.5.0",
             "config": "test=123",
             "test_env": "python==3.12.7 nonebot2==2.4.0 pydantic==2.10.0",
+            "dependencies": [],
+            "requirements": {
+                "nonebot-plugin-treehelp": "0.5.0",
+                "nonebot2": "2.4.0",
+                "pydantic-core": "2.27.0",
+                "pydantic": "2.10.0",
+            },
+            "peak_memory": 204800,
+            "cpu_time": 10.5,
+            "duration": 12.5,
+            "install_size": None,
         }
     )
 
     mocked_get_plugin_list.assert_called_once()
     mocked_command.assert_called()
+
+
+async def test_uv_plugin_test(mocker: MockerFixture, tmp_path: Path):
+    """使用 uv 安装插件"""
+    import sys
+
+    from src.providers.docker_test.plugin_test import PluginTest
+
+    test = PluginTest("project_link:module_name", None, installer="uv")
+
+    mocker.patch.object(test, "_test_dir", tmp_path)
+
+    def command_output(cmd: str, timeout: int = 300):
+        if cmd == f"uv venv --python {sys.executable} && uv pip install project_link":
+            return (True, "Installed 16 packages in 20ms", "")
+        if cmd == ".venv/bin/python package_info.py":
+            return (
+                True,
+                json.dumps(
+                    {
+                        "version": "0.5.0",
+                        "requirements": {"nonebot2": "2.4.0", "pydantic": "2.10.0"},
+                    }
+                ),
+                "",
+            )
+        if cmd == ".venv/bin/python runner.py":
+            return (True, "", "")
+
+        raise ValueError(f"Unknown command: {cmd}")
+
+    mocked_command = mocker.patch.object(test, "command")
+    mocked_command.side_effect = command_output
+
+    mocked_get_plugin_list = mocker.patch(
+        "src.providers.docker_test.plugin_test.get_plugin_list"
+    )
+    mocked_get_plugin_list.return_value = {}
+
+    result = await test.run()
+
+    assert result["run"] is True
+    assert result["load"] is True
+    assert result["version"] == "0.5.0"
+    assert result["test_env"].endswith("nonebot2==2.4.0 pydantic==2.10.0")
+
+
+def test_package_info_script(tmp_path: Path):
+    """在虚拟环境中读取已安装的包的信息"""
+    import subprocess
+    import sys
+    from importlib.metadata import version
+
+    from src.providers.docker_test.plugin_test import PACKAGE_INFO_SCRIPT
+
+    script = tmp_path / "package_info.py"
+    script.write_text(PACKAGE_INFO_SCRIPT.format("Pydantic_Core"), encoding="utf-8")
+
+    output = subprocess.run(
+        [sys.executable, script], capture_output=True, text=True, check=True
+    ).stdout
+    data = json.loads(output)
+
+    assert data["version"] == version("pydantic-core")
+    assert data["requirements"]["pydantic-core"] == version("pydantic-core")
+
+
+def test_get_plugin_list_local(mocker: MockerFixture, tmp_path: Path):
+    """容器中通过 file:// 网址读取挂载的插件列表"""
+    from src.providers.docker_test.plugin_test import get_plugin_list
+
+    plugins_path = tmp_path / "plugins.json"
+    plugins_path.write_text(
+        json.dumps(
+            [{"project_link": "nonebot_plugin_treehelp", "module_name": "treehelp"}]
+        ),
+        encoding="utf-8",
+    )
+    mocker.patch(
+        "src.providers.docker_test.plugin_test.PLUGINS_URL", plugins_path.as_uri()
+    )
+
+    assert get_plugin_list() == snapshot({"nonebot-plugin-treehelp": "treehelp"})
+
+
+def test_resource_usage(mocker: MockerFixture):
+    """峰值内存只在测试期间变大时记录
+
+    批量测试时 ru_maxrss 会包含之前测试的插件
+    """
+    from src.providers.docker_test.plugin_test import PluginTest
+
+    test = PluginTest("project_link:module_name")
+    start_usage = mocker.Mock(ru_maxrss=204800, ru_utime=1.0, ru_stime=0.5)
+
+    mocker.patch(
+        "src.providers.docker_test.plugin_test.resource.getrusage",
+        return_value=mocker.Mock(ru_maxrss=409600, ru_utime=2.0, ru_stime=1.0),
+    )
+    assert test._resource_usage(start_usage) == snapshot(
+        {"peak_memory": 409600, "cpu_time": 1.5}
+    )
+
+    mocker.patch(
+        "src.providers.docker_test.plugin_test.resource.getrusage",
+        return_value=mocker.Mock(ru_maxrss=204800, ru_utime=2.0, ru_stime=1.0),
+    )
+    assert test._resource_usage(start_usage) == snapshot(
+        {"peak_memory": None, "cpu_time": 1.5}
+    )
+
+
+async def test_run_batch(
+    mocker: MockerFixture, capsys, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """依次测试多个插件，每个插件输出一行结果
+
+    测试完成后删除插件的测试目录
+    """
+    from src.providers.docker_test.plugin_test import PluginTest, run_batch
+
+    monkeypatch.chdir(tmp_path)
+
+    async def run(self: PluginTest):
+        self.path.mkdir(parents=True)
+        if self.project_link == "error":
+            raise ValueError("error")
+        # 插件列表只需要获取一次
+        assert self.plugin_list == {}
+        print(json.dumps({"key": self.key, "config": self.config}))  # noqa: T201
+
+    mocker.patch.object(PluginTest, "run", run)
+    mocked_get_plugin_list = mocker.patch(
+        "src.providers.docker_test.plugin_test.get_plugin_list"
+    )
+    mocked_get_plugin_list.return_value = {}
+
+    await run_batch(
+        [
+            {"key": "project_link:module_name", "config": "a=1"},
+            {"key": "error:error", "config": None},
+            {"key": "project_link2:module_name2", "config": None},
+        ]
+    )
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert lines == snapshot(
+        [
+            {"key": "project_link:module_name", "config": "a=1"},
+            {
+                "metadata": None,
+                "outputs": ["插件测试出错：error"],
+                "load": False,
+                "run": False,
+                "version": None,
+                "config": None,
+            },
+            {"key": "project_link2:module_name2", "config": None},
+        ]
+    )
+    mocked_get_plugin_list.assert_called_once()
+    assert list((tmp_path / "plugin_test").iterdir()) == []
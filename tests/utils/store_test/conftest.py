@@ -1,3 +1,4 @@
+from collections.abc import Callable
 from pathlib import Path
 
 import pyjson5
@@ -45,6 +46,10 @@ def mocked_store_data(
         "plugins": plugin_test_path / "plugins.json",
         "results": plugin_test_path / "results.json",
         "plugin_configs": plugin_test_path / "plugin_configs.json",
+        "authors": plugin_test_path / "authors.json",
+        "journal": plugin_test_path / "journal.jsonl",
+        "dependents": plugin_test_path / "dependents.json",
+        "retests": plugin_test_path / "retests.json",
     }
 
     mocker.patch("src.providers.store_test.store.RESULTS_PATH", paths["results"])
@@ -55,6 +60,10 @@ def mocked_store_data(
     mocker.patch(
         "src.providers.store_test.store.PLUGIN_CONFIG_PATH", paths["plugin_configs"]
     )
+    mocker.patch("src.providers.store_test.store.AUTHORS_PATH", paths["authors"])
+    mocker.patch("src.providers.store_test.store.JOURNAL_PATH", paths["journal"])
+    mocker.patch("src.providers.store_test.store.DEPENDENTS_PATH", paths["dependents"])
+    mocker.patch("src.providers.store_test.store.RETESTS_PATH", paths["retests"])
 
     mocked_api.get(STORE_ADAPTERS_URL).respond(json=load_json("store_adapters"))
     mocked_api.get(STORE_BOTS_URL).respond(json=load_json("store_bots"))
@@ -68,3 +77,29 @@ def mocked_store_data(
     mocked_api.get(REGISTRY_PLUGIN_CONFIG_URL).respond(json=load_json("plugin_configs"))
 
     return paths
+
+
+@pytest.fixture
+def validate_result() -> Callable:
+    """模拟插件测试通过时 validate_plugin 的返回值"""
+    from src.providers.models import RegistryPlugin, StorePlugin, StoreTestResult
+
+    def factory(store_plugin: StorePlugin):
+        return StoreTestResult(
+            version="0.5.0",
+            results={"validation": True, "load": True, "metadata": True},
+            outputs={"validation": None, "load": "output", "metadata": None},
+        ), RegistryPlugin(
+            **store_plugin.model_dump(),
+            name="name",
+            desc="desc",
+            author="author",
+            homepage="https://nonebot.dev/",
+            type="application",
+            valid=True,
+            time="2023-08-28T00:00:00.000000+08:00",
+            version="0.5.0",
+            skip_test=False,
+        )
+
+    return factory
@@ -0,0 +1,62 @@
+import json
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from inline_snapshot import snapshot
+from respx import MockRouter
+
+
+async def test_resolve_author_names(
+    mocked_store_data: dict[str, Path], mocked_api: MockRouter
+) -> None:
+    """优先使用缓存中的作者用户名
+
+    作者 1 的缓存未过期，不需要请求
+    作者 2 没有缓存，需要请求
+    """
+    from src.providers.store_test.store import StoreTest
+
+    mocked_store_data["authors"].write_text(
+        json.dumps(
+            {
+                "1": {
+                    "login": "cached",
+                    "time": datetime.now(ZoneInfo("Asia/Shanghai")).isoformat(),
+                }
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    test = StoreTest()
+    authors = await test.resolve_author_names([1, 2, 3])
+
+    assert authors == snapshot({1: "cached", 2: "BigOrangeQWQ"})
+    assert not mocked_api["github_username_1"].called
+    assert mocked_api["github_username_2"].called
+
+    test.dump_data()
+    assert json.loads(
+        mocked_store_data["authors"].read_text(encoding="utf-8")
+    ).keys() == {
+        "1",
+        "2",
+    }
+
+
+async def test_resolve_author_names_from_registry(
+    mocked_store_data: dict[str, Path], mocked_api: MockRouter
+) -> None:
+    """仓库中已有的作者用户名可以直接使用，需要刷新时才重新请求"""
+    from src.providers.store_test.store import StoreTest
+
+    test = StoreTest()
+
+    authors = await test.resolve_author_names([1], refresh=False)
+    assert authors == snapshot({1: "he0119"})
+    assert not mocked_api["github_username_1"].called
+
+    authors = await test.resolve_author_names([1])
+    assert authors == snapshot({1: "he0119"})
+    assert mocked_api["github_username_1"].called
@@ -137,55 +137,29 @@ async def test_store_sync(
             },
         ]
     )
-    assert load_json(mocked_store_data["results"]) == snapshot(
-        {
-            "nonebot-plugin-datastore:nonebot_plugin_datastore": {
-                "time": "2023-06-26T22:08:18.945584+08:00",
-                "config": "",
-                "version": "1.0.0",
-                "test_env": None,
-                "results": {"validation": True, "load": True, "metadata": True},
-                "outputs": {
-                    "validation": None,
-                    "load": "datastore",
-                    "metadata": {
-                        "name": "数据存储",
-                        "description": "NoneBot 数据存储插件",
-                        "usage": "请参考文档",
-                        "type": "library",
-                        "homepage": "https://github.com/he0119/nonebot-plugin-datastore",
-                        "supported_adapters": None,
-                    },
-                },
-            },
-            "nonebot-plugin-treehelp:nonebot_plugin_treehelp": {
-                "time": "2023-06-26T22:20:41.833311+08:00",
-                "config": "",
-                "version": "0.3.0",
-                "test_env": None,
-                "results": {"validation": True, "load": True, "metadata": True},
-                "outputs": {
-                    "validation": None,
-                    "load": "treehelp",
-                    "metadata": {
-                        "name": "帮助",
-                        "description": "获取插件帮助信息",
-                        "usage": """\
-获取插件列表
-/help
-获取插件树
-/help -t
-/help --tree
-获取某个插件的帮助
-/help 插件名
-获取某个插件的树
-/help --tree 插件名
-""",
-                        "type": "application",
-                        "homepage": "https://github.com/he0119/nonebot-plugin-treehelp",
-                        "supported_adapters": None,
-                    },
-                },
-            },
-        }
-    )
+    # 测试结果没有变化，不需要保存
+    assert not mocked_store_data["results"].exists()
+
+
+async def test_store_sync_unchanged(
+    mocked_store_data: dict[str, Path], mocked_api: MockRouter
+) -> None:
+    """与商店数据一致的条目直接沿用，不会重新构建"""
+    from src.providers.store_test.store import StoreTest
+
+    test = StoreTest()
+    previous_drivers = dict(test._previous_drivers)
+    previous_plugins = dict(test._previous_plugins)
+
+    await test.sync_store()
+
+    # 增加了 tag 的条目需要重新构建
+    none_driver = ":~none"
+    assert test._previous_drivers[none_driver] is not previous_drivers[none_driver]
+    datastore = "nonebot-plugin-datastore:nonebot_plugin_datastore"
+    assert test._previous_plugins[datastore] is not previous_plugins[datastore]
+    # 未变化的条目直接沿用
+    fastapi_driver = "nonebot2[fastapi]:~fastapi"
+    assert test._previous_drivers[fastapi_driver] is previous_drivers[fastapi_driver]
+    treehelp = "nonebot-plugin-treehelp:nonebot_plugin_treehelp"
+    assert test._previous_plugins[treehelp] is previous_plugins[treehelp]
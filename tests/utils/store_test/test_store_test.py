@@ -1,3 +1,5 @@
+import json
+from collections.abc import Callable
 from pathlib import Path
 
 import httpx
@@ -90,6 +92,8 @@ async def test_store_test(
             skip_test=False,
         ),
         config="TEST_CONFIG=true",
+        author_name="he0119",
+        plugin_test_result=None,
     )
     assert mocked_api["project_link_treehelp"].called
     assert mocked_api["project_link_datastore"].called
@@ -107,28 +111,34 @@ async def test_store_test(
         '[{"module_name":"nonebot_plugin_datastore","project_link":"nonebot-plugin-datastore","name":"数据存储","desc":"NoneBot 数据存储插件","author":"he0119","homepage":"https://github.com/he0119/nonebot-plugin-datastore","tags":[{"label":"good first plugin","color":"#ffffff"}],"is_official":false,"type":"library","supported_adapters":null,"valid":true,"time":"2023-06-22 11:58:18","version":"0.0.1","skip_test":false},{"module_name":"nonebot_plugin_treehelp","project_link":"nonebot-plugin-treehelp","name":"帮助","desc":"获取插件帮助信息","author":"author","homepage":"https://nonebot.dev/","tags":[],"is_official":false,"type":"application","supported_adapters":null,"valid":true,"time":"2023-08-28T00:00:00.000000+08:00","version":"0.3.0","skip_test":false}]'
     )
     assert mocked_store_data["results"].read_text(encoding="utf-8") == snapshot(
-        '{"nonebot-plugin-datastore:nonebot_plugin_datastore":{"time":"2023-06-26T22:08:18.945584+08:00","config":"","version":"1.0.0","test_env":null,"results":{"validation":true,"load":true,"metadata":true},"outputs":{"validation":null,"load":"datastore","metadata":{"name":"数据存储","description":"NoneBot 数据存储插件","usage":"请参考文档","type":"library","homepage":"https://github.com/he0119/nonebot-plugin-datastore","supported_adapters":null}}},"nonebot-plugin-treehelp:nonebot_plugin_treehelp":{"time":"2023-08-28T00:00:00.000000+08:00","config":"","version":"1.0.0","test_env":null,"results":{"load":true,"metadata":true,"validation":true},"outputs":{"load":"output","metadata":{"name":"帮助","description":"获取插件帮助信息","usage":"获取插件列表\\n/help\\n获取插件树\\n/help -t\\n/help --tree\\n获取某个插件的帮助\\n/help 插件名\\n获取某个插件的树\\n/help --tree 插件名\\n","type":"application","homepage":"https://nonebot.dev/","supported_adapters":null},"validation":null}}}'
-    )
-    assert mocked_store_data["plugin_configs"].read_text(encoding="utf-8") == snapshot(
-        """\
-{
-  "nonebot-plugin-treehelp:nonebot_plugin_treehelp": "TEST_CONFIG=true",
-  "nonebot-plugin-datastore:nonebot_plugin_datastore": ""
-}\
-"""
+        '{"nonebot-plugin-datastore:nonebot_plugin_datastore":{"time":"2023-06-26T22:08:18.945584+08:00","config":"","version":"1.0.0","test_env":null,"results":{"validation":true,"load":true,"metadata":true},"outputs":{"validation":null,"load":"datastore","metadata":{"name":"数据存储","description":"NoneBot 数据存储插件","usage":"请参考文档","type":"library","homepage":"https://github.com/he0119/nonebot-plugin-datastore","supported_adapters":null}},"duration":null,"install_size":null,"dependencies":null,"env_hash":null},"nonebot-plugin-treehelp:nonebot_plugin_treehelp":{"time":"2023-08-28T00:00:00.000000+08:00","config":"","version":"1.0.0","test_env":null,"results":{"load":true,"metadata":true,"validation":true},"outputs":{"load":"output","metadata":{"name":"帮助","description":"获取插件帮助信息","usage":"获取插件列表\\n/help\\n获取插件树\\n/help -t\\n/help --tree\\n获取某个插件的帮助\\n/help 插件名\\n获取某个插件的树\\n/help --tree 插件名\\n","type":"application","homepage":"https://nonebot.dev/","supported_adapters":null},"validation":null},"duration":null,"install_size":null,"dependencies":null,"env_hash":null}}'
     )
+    # 插件配置没有变化，不需要保存
+    assert not mocked_store_data["plugin_configs"].exists()
 
 
 async def test_store_test_with_key(
     mocked_store_data: dict[str, Path], mocked_api: MockRouter, mocker: MockerFixture
 ) -> None:
     """测试指定插件，因为版本更新正常测试"""
-    from src.providers.store_test.store import RegistryPlugin, StorePlugin, StoreTest
+    from src.providers.store_test.store import (
+        RegistryPlugin,
+        StorePlugin,
+        StoreTest,
+        StoreTestResult,
+    )
 
     mocked_validate_plugin = mocker.patch(
         "src.providers.store_test.store.validate_plugin"
     )
-    mocked_validate_plugin.return_value = ({}, {})
+    mocked_validate_plugin.return_value = (
+        StoreTestResult(
+            version="0.3.1",
+            results={"validation": True, "load": True, "metadata": True},
+            outputs={"validation": None, "load": "output", "metadata": None},
+        ),
+        {},
+    )
 
     test = StoreTest()
     await test.run_single_plugin(key="nonebot-plugin-treehelp:nonebot_plugin_treehelp")
@@ -158,6 +168,8 @@ async def test_store_test_with_key(
             skip_test=False,
         ),
         config="TEST_CONFIG=true",
+        author_name="he0119",
+        plugin_test_result=None,
     )
 
     assert mocked_api["project_link_treehelp"].called
@@ -225,11 +237,13 @@ async def test_store_test_raise(
                 ),
                 previous_plugin=None,
                 config="",
+                author_name="he0119",
+                plugin_test_result=None,
             ),  # type: ignore
         ]
     )
 
-    # 数据没有更新，只是被压缩
+    # 商店数据同步后需要保存
     assert mocked_store_data["adapters"].read_text(encoding="utf-8") == snapshot(
         '[{"module_name":"nonebot.adapters.onebot.v11","project_link":"nonebot-adapter-onebot","name":"OneBot V11","desc":"OneBot V11 协议","author":"yanyongyu","homepage":"https://onebot.adapters.nonebot.dev/","tags":[{"label":"sync","color":"#ffffff"}],"is_official":true},{"module_name":"nonebot.adapters.onebot.v12","project_link":"nonebot-adapter-onebot","name":"OneBot V12","desc":"OneBot V12 协议","author":"he0119","homepage":"https://onebot.adapters.nonebot.dev/","tags":[],"is_official":true}]'
     )
@@ -242,9 +256,8 @@ async def test_store_test_raise(
     assert mocked_store_data["plugins"].read_text(encoding="utf-8") == snapshot(
         '[{"module_name":"nonebot_plugin_datastore","project_link":"nonebot-plugin-datastore","name":"数据存储","desc":"NoneBot 数据存储插件","author":"he0119","homepage":"https://github.com/he0119/nonebot-plugin-datastore","tags":[{"label":"good first plugin","color":"#ffffff"}],"is_official":false,"type":"library","supported_adapters":null,"valid":true,"time":"2023-06-22 11:58:18","version":"0.0.1","skip_test":false},{"module_name":"nonebot_plugin_treehelp","project_link":"nonebot-plugin-treehelp","name":"帮助","desc":"获取插件帮助信息","author":"he0119","homepage":"https://github.com/he0119/nonebot-plugin-treehelp","tags":[],"is_official":false,"type":"application","supported_adapters":null,"valid":true,"time":"2023-06-22 12:10:18","version":"0.0.1","skip_test":false}]'
     )
-    assert mocked_store_data["results"].read_text(encoding="utf-8") == snapshot(
-        '{"nonebot-plugin-datastore:nonebot_plugin_datastore":{"time":"2023-06-26T22:08:18.945584+08:00","config":"","version":"1.0.0","test_env":null,"results":{"validation":true,"load":true,"metadata":true},"outputs":{"validation":null,"load":"datastore","metadata":{"name":"数据存储","description":"NoneBot 数据存储插件","usage":"请参考文档","type":"library","homepage":"https://github.com/he0119/nonebot-plugin-datastore","supported_adapters":null}}},"nonebot-plugin-treehelp:nonebot_plugin_treehelp":{"time":"2023-06-26T22:20:41.833311+08:00","config":"","version":"0.3.0","test_env":null,"results":{"validation":true,"load":true,"metadata":true},"outputs":{"validation":null,"load":"treehelp","metadata":{"name":"帮助","description":"获取插件帮助信息","usage":"获取插件列表\\n/help\\n获取插件树\\n/help -t\\n/help --tree\\n获取某个插件的帮助\\n/help 插件名\\n获取某个插件的树\\n/help --tree 插件名\\n","type":"application","homepage":"https://github.com/he0119/nonebot-plugin-treehelp","supported_adapters":null}}}}'
-    )
+    # 测试结果没有变化，不需要保存
+    assert not mocked_store_data["results"].exists()
 
     assert mocked_api["project_link_datastore"].called
     assert mocked_api["project_link_treehelp"].called
@@ -278,21 +291,718 @@ async def test_store_test_with_key_raise(
         ),
         previous_plugin=None,
         config="",
+        author_name="he0119",
+        plugin_test_result=None,
     )
 
-    # 数据没有更新，只是被压缩
-    assert mocked_store_data["adapters"].read_text(encoding="utf-8") == snapshot(
-        '[{"module_name":"nonebot.adapters.onebot.v11","project_link":"nonebot-adapter-onebot","name":"OneBot V11","desc":"OneBot V11 协议","author":"yanyongyu","homepage":"https://onebot.adapters.nonebot.dev/","tags":[],"is_official":true}]'
+    # 数据没有更新，不需要保存
+    assert not mocked_store_data["adapters"].exists()
+    assert not mocked_store_data["bots"].exists()
+    assert not mocked_store_data["drivers"].exists()
+    assert not mocked_store_data["plugins"].exists()
+    assert not mocked_store_data["results"].exists()
+    # 新插件的配置需要保存
+    assert mocked_store_data["plugin_configs"].exists()
+
+
+async def test_store_test_jobs(
+    mocked_store_data: dict[str, Path],
+    mocked_api: MockRouter,
+    mocker: MockerFixture,
+    validate_result: Callable,
+):
+    """并行测试插件
+
+    第一个插件因为版本号无变化跳过
+    第二个和第三个插件同时测试，且后开始的插件先完成测试
+    """
+    import asyncio
+
+    from src.providers.store_test.store import StoreTest
+
+    running = 0
+    max_running = 0
+
+    async def validate_plugin(
+        store_plugin, config, previous_plugin, author_name, plugin_test_result
+    ):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        # 让第一个开始测试的插件最后完成
+        await asyncio.sleep(0.1 if previous_plugin else 0)
+        running -= 1
+        return validate_result(store_plugin)
+
+    mocker.patch("src.providers.store_test.store.validate_plugin", validate_plugin)
+
+    test = StoreTest()
+    new_results, new_plugins = await test.test_plugins(2, 0, False, jobs=2)
+
+    assert max_running == 2
+    # 结果按照商店中的顺序排列
+    assert list(new_results) == snapshot(
+        [
+            "nonebot-plugin-treehelp:nonebot_plugin_treehelp",
+            "nonebot-plugin-wordcloud:nonebot_plugin_wordcloud",
+        ]
     )
-    assert mocked_store_data["bots"].read_text(encoding="utf-8") == snapshot(
-        '[{"name":"CoolQBot","desc":"基于 NoneBot2 的聊天机器人","author":"he0119","homepage":"https://github.com/he0119/CoolQBot","tags":[],"is_official":false}]'
+    assert list(new_plugins) == list(new_results)
+
+
+async def test_store_test_jobs_raise(
+    mocked_store_data: dict[str, Path],
+    mocked_api: MockRouter,
+    mocker: MockerFixture,
+    validate_result: Callable,
+):
+    """并行测试插件，但是先开始的插件测试失败
+
+    第二个插件完成时已经达到上限，第一个插件失败后需要补上第三个插件
+    """
+    import asyncio
+
+    from src.providers.store_test.store import StoreTest
+
+    tested: list[str] = []
+
+    async def validate_plugin(
+        store_plugin, config, previous_plugin, author_name, plugin_test_result
+    ):
+        tested.append(store_plugin.module_name)
+        if store_plugin.module_name == "nonebot_plugin_datastore":
+            await asyncio.sleep(0.1)
+            raise Exception("测试失败")
+        return validate_result(store_plugin)
+
+    mocker.patch("src.providers.store_test.store.validate_plugin", validate_plugin)
+
+    test = StoreTest()
+    new_results, new_plugins = await test.test_plugins(2, 0, True, jobs=2)
+
+    assert tested == snapshot(
+        [
+            "nonebot_plugin_datastore",
+            "nonebot_plugin_treehelp",
+            "nonebot_plugin_wordcloud",
+        ]
     )
-    assert mocked_store_data["drivers"].read_text(encoding="utf-8") == snapshot(
-        '[{"module_name":"~none","project_link":"","name":"None","desc":"None 驱动器","author":"yanyongyu","homepage":"/docs/advanced/driver","tags":[],"is_official":true},{"module_name":"~fastapi","project_link":"nonebot2[fastapi]","name":"FastAPI","desc":"FastAPI 驱动器","author":"yanyongyu","homepage":"/docs/advanced/driver","tags":[],"is_official":true}]'
+    assert list(new_results) == snapshot(
+        [
+            "nonebot-plugin-treehelp:nonebot_plugin_treehelp",
+            "nonebot-plugin-wordcloud:nonebot_plugin_wordcloud",
+        ]
     )
-    assert mocked_store_data["plugins"].read_text(encoding="utf-8") == snapshot(
-        '[{"module_name":"nonebot_plugin_datastore","project_link":"nonebot-plugin-datastore","name":"数据存储","desc":"NoneBot 数据存储插件","author":"he0119","homepage":"https://github.com/he0119/nonebot-plugin-datastore","tags":[],"is_official":false,"type":"library","supported_adapters":null,"valid":true,"time":"2023-06-22 11:58:18","version":"0.0.1","skip_test":false},{"module_name":"nonebot_plugin_treehelp","project_link":"nonebot-plugin-treehelp","name":"帮助","desc":"获取插件帮助信息","author":"he0119","homepage":"https://github.com/he0119/nonebot-plugin-treehelp","tags":[],"is_official":false,"type":"application","supported_adapters":null,"valid":true,"time":"2023-06-22 12:10:18","version":"0.0.1","skip_test":false}]'
+    assert list(new_plugins) == list(new_results)
+
+
+async def test_store_test_resume(
+    mocked_store_data: dict[str, Path],
+    mocked_api: MockRouter,
+    mocker: MockerFixture,
+    validate_result: Callable,
+):
+    """从上次中断的地方继续测试
+
+    第一次测试完第二个插件后中断，恢复后只需要测试第三个插件
+    """
+    from src.providers.store_test.store import StoreTest
+
+    tested: list[str] = []
+
+    async def validate_plugin(
+        store_plugin, config, previous_plugin, author_name, plugin_test_result
+    ):
+        tested.append(store_plugin.module_name)
+        return validate_result(store_plugin)
+
+    mocker.patch("src.providers.store_test.store.validate_plugin", validate_plugin)
+
+    # 模拟测试了一个插件之后中断
+    await StoreTest().test_plugins(1, 0, False)
+    assert tested == snapshot(["nonebot_plugin_treehelp"])
+
+    await StoreTest().run(2, 0, False, resume=True)
+    assert tested == snapshot(["nonebot_plugin_treehelp", "nonebot_plugin_wordcloud"])
+
+    # 恢复的测试结果也会被保存
+    results = json.loads(mocked_store_data["results"].read_text(encoding="utf-8"))
+    assert results["nonebot-plugin-treehelp:nonebot_plugin_treehelp"][
+        "version"
+    ] == snapshot("0.5.0")
+    assert results["nonebot-plugin-wordcloud:nonebot_plugin_wordcloud"][
+        "version"
+    ] == snapshot("0.5.0")
+    # 测试完成后清除测试进度
+    assert not mocked_store_data["journal"].exists()
+
+
+async def test_store_test_journal_failed(
+    mocked_store_data: dict[str, Path],
+    mocked_api: MockRouter,
+    mocker: MockerFixture,
+    validate_result: Callable,
+):
+    """保存测试进度失败时，测试结果仍然保留且计入测试数量"""
+    from src.providers.store_test.store import StoreTest
+
+    tested: list[str] = []
+
+    async def validate_plugin(
+        store_plugin, config, previous_plugin, author_name, plugin_test_result
+    ):
+        tested.append(store_plugin.module_name)
+        return validate_result(store_plugin)
+
+    mocker.patch("src.providers.store_test.store.validate_plugin", validate_plugin)
+    mocker.patch(
+        "src.providers.store_test.store.StoreTest.write_journal",
+        side_effect=OSError("No space left on device"),
     )
-    assert mocked_store_data["results"].read_text(encoding="utf-8") == snapshot(
-        '{"nonebot-plugin-datastore:nonebot_plugin_datastore":{"time":"2023-06-26T22:08:18.945584+08:00","config":"","version":"1.0.0","test_env":null,"results":{"validation":true,"load":true,"metadata":true},"outputs":{"validation":null,"load":"datastore","metadata":{"name":"数据存储","description":"NoneBot 数据存储插件","usage":"请参考文档","type":"library","homepage":"https://github.com/he0119/nonebot-plugin-datastore","supported_adapters":null}}},"nonebot-plugin-treehelp:nonebot_plugin_treehelp":{"time":"2023-06-26T22:20:41.833311+08:00","config":"","version":"0.3.0","test_env":null,"results":{"validation":true,"load":true,"metadata":true},"outputs":{"validation":null,"load":"treehelp","metadata":{"name":"帮助","description":"获取插件帮助信息","usage":"获取插件列表\\n/help\\n获取插件树\\n/help -t\\n/help --tree\\n获取某个插件的帮助\\n/help 插件名\\n获取某个插件的树\\n/help --tree 插件名\\n","type":"application","homepage":"https://github.com/he0119/nonebot-plugin-treehelp","supported_adapters":null}}}}'
+
+    new_results, new_plugins = await StoreTest().test_plugins(1, 0, False)
+
+    assert tested == snapshot(["nonebot_plugin_treehelp"])
+    assert list(new_results) == snapshot(
+        ["nonebot-plugin-treehelp:nonebot_plugin_treehelp"]
+    )
+    assert list(new_plugins) == list(new_results)
+
+
+async def test_store_test_batch(
+    mocked_store_data: dict[str, Path],
+    mocked_api: MockRouter,
+    mocker: MockerFixture,
+    validate_result: Callable,
+):
+    """在同一个容器中批量测试插件
+
+    批量测试中缺少结果的插件会单独测试
+    """
+    from src.providers.docker_test import DockerTestResult
+    from src.providers.store_test.store import StoreTest
+
+    plugin_test_result = DockerTestResult(
+        run=True, load=True, version="0.5.0", metadata=None, outputs=[]
+    )
+    mocked_batch_run = mocker.patch(
+        "src.providers.store_test.store.DockerBatchPluginTest.run",
+        return_value={
+            "nonebot-plugin-treehelp:nonebot_plugin_treehelp": plugin_test_result
+        },
+    )
+    received: dict[str, DockerTestResult | None] = {}
+
+    async def validate_plugin(
+        store_plugin, config, previous_plugin, author_name, plugin_test_result
+    ):
+        received[store_plugin.module_name] = plugin_test_result
+        return validate_result(store_plugin)
+
+    mocker.patch("src.providers.store_test.store.validate_plugin", validate_plugin)
+    mocker.patch("src.providers.store_test.store.StoreTest.write_journal")
+
+    test = StoreTest()
+    new_results, _ = await test.test_plugins(2, 0, False, batch_size=2)
+
+    mocked_batch_run.assert_awaited_once_with("3.12")
+    assert received == snapshot(
+        {
+            "nonebot_plugin_treehelp": DockerTestResult(
+                run=True, load=True, version="0.5.0", metadata=None, outputs=[]
+            ),
+            "nonebot_plugin_wordcloud": None,
+        }
+    )
+    assert list(new_results) == snapshot(
+        [
+            "nonebot-plugin-treehelp:nonebot_plugin_treehelp",
+            "nonebot-plugin-wordcloud:nonebot_plugin_wordcloud",
+        ]
+    )
+
+
+async def test_store_test_schedule(
+    mocked_store_data: dict[str, Path], mocked_api: MockRouter
+):
+    """根据历史耗时安排测试顺序
+
+    耗时长的插件先测试，设置时间预算时只测试能在预算内完成的插件
+    """
+    from src.providers.store_test.store import StoreTest
+
+    test = StoreTest()
+    datastore = "nonebot-plugin-datastore:nonebot_plugin_datastore"
+    treehelp = "nonebot-plugin-treehelp:nonebot_plugin_treehelp"
+    wordcloud = "nonebot-plugin-wordcloud:nonebot_plugin_wordcloud"
+    test._previous_results[datastore].duration = 60
+    test._previous_results[treehelp].duration = 600
+    # wordcloud 没有历史记录，按照默认的 300 秒估计
+    keys = [datastore, treehelp, wordcloud]
+
+    assert test.schedule_plugins(keys, 2, 2, None) == snapshot(
+        [
+            "nonebot-plugin-treehelp:nonebot_plugin_treehelp",
+            "nonebot-plugin-datastore:nonebot_plugin_datastore",
+            "nonebot-plugin-wordcloud:nonebot_plugin_wordcloud",
+        ]
+    )
+    # 两个插件同时测试，6 分钟内可以测试 720 秒
+    assert test.schedule_plugins(keys, 1, 2, 6) == snapshot(
+        [
+            "nonebot-plugin-treehelp:nonebot_plugin_treehelp",
+            "nonebot-plugin-datastore:nonebot_plugin_datastore",
+        ]
+    )
+    assert test.schedule_plugins(keys, 1, 1, 6) == snapshot(
+        [
+            "nonebot-plugin-wordcloud:nonebot_plugin_wordcloud",
+            "nonebot-plugin-datastore:nonebot_plugin_datastore",
+        ]
+    )
+
+
+async def test_store_test_budget(
+    mocked_store_data: dict[str, Path], mocked_api: MockRouter, mocker: MockerFixture
+):
+    """设置时间预算时不再限制测试数量"""
+    from src.providers.store_test.store import StoreTest
+
+    mocked_test_plugin = mocker.patch(
+        "src.providers.store_test.store.StoreTest.test_plugin",
+        return_value=(mocker.MagicMock(), mocker.MagicMock()),
+    )
+    mocker.patch("src.providers.store_test.store.StoreTest.write_journal")
+
+    test = StoreTest()
+    new_results, _ = await test.test_plugins(1, 0, False, budget=10)
+
+    # 第一个插件为最新版本，跳过测试
+    assert list(new_results) == snapshot(
+        [
+            "nonebot-plugin-treehelp:nonebot_plugin_treehelp",
+            "nonebot-plugin-wordcloud:nonebot_plugin_wordcloud",
+        ]
+    )
+    assert mocked_test_plugin.await_count == 2
+
+
+async def test_store_test_priority(
+    mocked_store_data: dict[str, Path], mocked_api: MockRouter, mocker: MockerFixture
+):
+    """优先测试最有可能改变测试结果的插件"""
+    from src.providers.store_test.store import StoreTest
+
+    test = StoreTest()
+    datastore = "nonebot-plugin-datastore:nonebot_plugin_datastore"
+    treehelp = "nonebot-plugin-treehelp:nonebot_plugin_treehelp"
+    wordcloud = "nonebot-plugin-wordcloud:nonebot_plugin_wordcloud"
+    keys = [datastore, treehelp, wordcloud]
+
+    # wordcloud 从未测试过，treehelp 有新版本，datastore 为最新版本
+    assert test.prioritize_plugins(keys) == snapshot(
+        [
+            "nonebot-plugin-wordcloud:nonebot_plugin_wordcloud",
+            "nonebot-plugin-treehelp:nonebot_plugin_treehelp",
+            "nonebot-plugin-datastore:nonebot_plugin_datastore",
+        ]
+    )
+
+    # 版本相同时，上次加载失败的插件优先，其次是跳过测试的插件，最后是测试时间更早的插件
+    test._previous_results[treehelp].version = "0.3.1"
+    assert test.prioritize_plugins([datastore, treehelp]) == snapshot(
+        [
+            "nonebot-plugin-datastore:nonebot_plugin_datastore",
+            "nonebot-plugin-treehelp:nonebot_plugin_treehelp",
+        ]
+    )
+    test._previous_plugins[treehelp].skip_test = True
+    assert test.prioritize_plugins([datastore, treehelp]) == snapshot(
+        [
+            "nonebot-plugin-treehelp:nonebot_plugin_treehelp",
+            "nonebot-plugin-datastore:nonebot_plugin_datastore",
+        ]
+    )
+    test._previous_results[datastore].results["load"] = False
+    assert test.prioritize_plugins([datastore, treehelp]) == snapshot(
+        [
+            "nonebot-plugin-datastore:nonebot_plugin_datastore",
+            "nonebot-plugin-treehelp:nonebot_plugin_treehelp",
+        ]
+    )
+
+    # 依赖的插件有新版本或者依赖有更新时，与有新版本的插件一样优先测试
+    test._retest[treehelp] = datastore
+    assert test.prioritize_plugins([datastore, treehelp]) == snapshot(
+        [
+            "nonebot-plugin-treehelp:nonebot_plugin_treehelp",
+            "nonebot-plugin-datastore:nonebot_plugin_datastore",
+        ]
+    )
+    test._retest.clear()
+    test._previous_results[treehelp].env_hash = "old"
+    test._env_hashes[treehelp] = "new"
+    assert test.prioritize_plugins([datastore, treehelp]) == snapshot(
+        [
+            "nonebot-plugin-treehelp:nonebot_plugin_treehelp",
+            "nonebot-plugin-datastore:nonebot_plugin_datastore",
+        ]
+    )
+    test._previous_results[treehelp].env_hash = None
+    test._env_hashes.clear()
+
+    mocked_test_plugin = mocker.patch(
+        "src.providers.store_test.store.StoreTest.test_plugin",
+        return_value=(mocker.MagicMock(), mocker.MagicMock()),
+    )
+    mocker.patch("src.providers.store_test.store.StoreTest.write_journal")
+
+    # 即使是最新版本，上次加载失败的插件也会被测试
+    new_results, _ = await test.test_plugins(1, 0, False, strategy="priority")
+    assert list(new_results) == snapshot(
+        ["nonebot-plugin-wordcloud:nonebot_plugin_wordcloud"]
+    )
+    new_results, _ = await test.test_plugins(2, 0, False, strategy="priority")
+    assert list(new_results) == snapshot(
+        [
+            "nonebot-plugin-datastore:nonebot_plugin_datastore",
+            "nonebot-plugin-wordcloud:nonebot_plugin_wordcloud",
+        ]
+    )
+    assert mocked_test_plugin.await_count == 3
+
+
+async def test_store_test_dependents(
+    mocked_store_data: dict[str, Path], mocked_api: MockRouter, mocker: MockerFixture
+):
+    """依赖的插件发布新版本时，即使插件版本没有变化也需要重新测试"""
+    from src.providers.store_test.store import StoreTest
+
+    test = StoreTest()
+    datastore = "nonebot-plugin-datastore:nonebot_plugin_datastore"
+    treehelp = "nonebot-plugin-treehelp:nonebot_plugin_treehelp"
+
+    # datastore 依赖 treehelp，而 treehelp 有新版本
+    test._previous_results[datastore].dependencies = ["nonebot_plugin_treehelp"]
+    assert test.get_dependents() == snapshot(
+        {
+            "nonebot-plugin-treehelp:nonebot_plugin_treehelp": [
+                "nonebot-plugin-datastore:nonebot_plugin_datastore"
+            ]
+        }
+    )
+
+    mocked_test_plugin = mocker.patch(
+        "src.providers.store_test.store.StoreTest.test_plugin",
+        return_value=(mocker.MagicMock(), mocker.MagicMock()),
+    )
+    mocker.patch("src.providers.store_test.store.StoreTest.write_journal")
+
+    new_results, _ = await test.test_plugins(1, 0, False)
+    assert list(new_results) == snapshot([datastore])
+    mocked_test_plugin.assert_awaited_once_with(datastore, None)
+    # 已经重新测试的插件不再需要重新测试
+    assert test._retest == snapshot({})
+
+    # 依赖关系会随测试结果一起保存
+    test._changed.add("results")
+    test.dump_data()
+    assert json.loads(
+        mocked_store_data["dependents"].read_text(encoding="utf-8")
+    ) == snapshot({treehelp: [datastore]})
+
+    # 达到测试上限时，没有重新测试的插件会被保存下来
+    test = StoreTest()
+    test._previous_results[datastore].dependencies = ["nonebot_plugin_treehelp"]
+    mocked_test_plugin.reset_mock()
+    new_results, _ = await test.test_plugins(1, 1, False)
+    assert list(new_results) == snapshot([treehelp])
+    test.dump_data()
+    assert json.loads(
+        mocked_store_data["retests"].read_text(encoding="utf-8")
+    ) == snapshot({datastore: treehelp})
+
+    # 依赖的插件已经测试过新版本，下次测试时仍然会重新测试
+    test = StoreTest()
+    test._previous_results[treehelp].version = "0.3.1"
+    mocked_test_plugin.reset_mock()
+    new_results, _ = await test.test_plugins(1, 0, False)
+    assert list(new_results) == snapshot([datastore])
+    test.dump_data()
+    assert json.loads(
+        mocked_store_data["retests"].read_text(encoding="utf-8")
+    ) == snapshot({})
+
+    # 不在测试范围内的依赖插件同样需要预先获取最新版本号
+    test = StoreTest()
+    test._previous_results[treehelp].dependencies = ["nonebot_plugin_datastore"]
+    mocked_get_latest_version = mocker.patch(
+        "src.providers.store_test.store.get_latest_version"
+    )
+    mocked_test_plugin.reset_mock()
+    await test.test_plugins(1, 1, False)
+    assert "nonebot-plugin-datastore" in test._latest_versions
+    mocked_get_latest_version.assert_not_called()
+
+
+def test_store_test_cli_strategy(mocker: MockerFixture):
+    """命令行参数会传递给商店测试"""
+    from click.testing import CliRunner
+
+    from src.providers.store_test.__main__ import cli
+    from src.providers.store_test.store import StoreTest
+
+    mocked_test = mocker.MagicMock()
+    mocked_test.run = mocker.AsyncMock()
+    mocker.patch.object(StoreTest, "load", mocker.AsyncMock(return_value=mocked_test))
+
+    result = CliRunner().invoke(
+        cli, ["plugin-test", "--limit", "3", "--jobs", "2", "--strategy", "priority"]
+    )
+
+    assert result.exit_code == 0, result.output
+    mocked_test.run.assert_awaited_once_with(3, 0, False, 2, False, 1, None, "priority")
+
+
+async def test_store_test_env_hash(
+    mocked_store_data: dict[str, Path], mocked_api: MockRouter, mocker: MockerFixture
+):
+    """插件版本没有变化，但依赖发生变化时重新测试"""
+    from src.providers.store_test.store import StoreTest
+    from src.providers.store_test.utils import get_env_hash
+
+    mocker.patch("src.providers.store_test.store.PLUGIN_TEST_INSTALLER", "uv")
+    requirements = {"nonebot-plugin-datastore": "1.0.0", "nonebot2": "2.4.0"}
+    mocked_resolve = mocker.patch(
+        "src.providers.store_test.store.resolve_requirements",
+        return_value=requirements,
+    )
+
+    test = StoreTest()
+    datastore = "nonebot-plugin-datastore:nonebot_plugin_datastore"
+    test._previous_results[datastore].env_hash = get_env_hash(
+        "1.0.0", requirements, "3.12", ""
+    )
+    await test.prefetch_latest_versions([datastore])
+
+    # 测试环境相同，跳过测试
+    await test.prefetch_env_hashes([datastore])
+    mocked_resolve.assert_awaited_once_with("nonebot-plugin-datastore", "3.12")
+    assert test.should_skip(datastore)
+
+    # 依赖有更新，重新测试
+    mocked_resolve.return_value = {**requirements, "nonebot2": "2.4.1"}
+    await test.prefetch_env_hashes([datastore])
+    assert not test.should_skip(datastore)
+
+    # 无法解析依赖时，只比较版本
+    test._env_hashes.clear()
+    mocked_resolve.return_value = None
+    await test.prefetch_env_hashes([datastore])
+    assert test.should_skip(datastore)
+
+    # 使用 poetry 安装插件时，本地解析的依赖与测试时不一致，不比较测试环境
+    mocker.patch("src.providers.store_test.store.PLUGIN_TEST_INSTALLER", "poetry")
+    mocked_resolve.reset_mock()
+    await test.prefetch_env_hashes([datastore])
+    mocked_resolve.assert_not_awaited()
+    assert test._env_hashes == {}
+
+
+async def test_store_test_env_hash_consistent(
+    mocked_store_data: dict[str, Path], mocked_api: MockRouter, mocker: MockerFixture
+):
+    """同一个测试环境，插件测试时与本地解析依赖时计算出的哈希值相同"""
+    from src.providers.docker_test import DockerTestResult
+    from src.providers.store_test.store import StoreTest
+
+    mocker.patch("src.providers.store_test.store.PLUGIN_TEST_INSTALLER", "uv")
+    mocker.patch("src.providers.store_test.validation.PLUGIN_TEST_INSTALLER", "uv")
+
+    # uv pip compile 的输出
+    mocked_process = mocker.MagicMock(returncode=0)
+    mocked_process.communicate = mocker.AsyncMock(
+        return_value=(
+            b"nonebot-plugin-datastore==1.0.0\n"
+            b"nonebot2==2.4.0\n"
+            b"pydantic-core==2.27.0\n"
+            b"typing-extensions==4.12.2\n",
+            None,
+        )
+    )
+    mocker.patch("asyncio.create_subprocess_exec", return_value=mocked_process)
+    for target in (
+        "src.providers.store_test.validation.get_upload_time",
+        "src.providers.validation.models.get_upload_time",
+    ):
+        mocker.patch(target, return_value="2023-06-26T22:08:18.945584+08:00")
+
+    # 插件测试时读取的虚拟环境中的包，包名写法与解析结果不同，并且可能包含安装工具自带的包
+    plugin_test_result = DockerTestResult(
+        run=True,
+        load=True,
+        version="1.0.0",
+        metadata=None,
+        outputs=[],
+        requirements={
+            "nonebot_plugin_datastore": "1.0.0",
+            "nonebot2": "2.4.0",
+            "Pydantic_Core": "2.27.0",
+            "typing-extensions": "4.12.2",
+            "pip": "24.3.1",
+        },
     )
+
+    test = StoreTest()
+    datastore = "nonebot-plugin-datastore:nonebot_plugin_datastore"
+    result, _ = await test.test_plugin(datastore, plugin_test_result)
+    assert result.env_hash is not None
+
+    test._previous_results[datastore] = result
+    await test.prefetch_latest_versions([datastore])
+    await test.prefetch_env_hashes([datastore])
+
+    assert test._env_hashes[datastore] == result.env_hash
+    assert test.should_skip(datastore)
+
+
+def count_calls(mocked_api: MockRouter, url: str) -> int:
+    return sum(str(request.url) == url for request, _ in mocked_api.calls)
+
+
+async def test_store_test_load(
+    mocked_store_data: dict[str, Path], mocked_api: MockRouter
+):
+    """并发下载的数据与按需下载的数据一致"""
+    from src.providers.store_test.store import COLLECTION_URLS, StoreTest
+
+    test = await StoreTest.load()
+    for url in COLLECTION_URLS.values():
+        assert count_calls(mocked_api, url) == 1
+
+    # 按需下载时，只有用到的数据才会下载
+    expected = StoreTest()
+    assert test._store_plugins == expected._store_plugins
+    assert test._previous_results == expected._previous_results
+    assert test._plugin_configs == expected._plugin_configs
+    assert {
+        name: count_calls(mocked_api, url) for name, url in COLLECTION_URLS.items()
+    } == snapshot(
+        {
+            "store_adapters": 1,
+            "store_bots": 1,
+            "store_drivers": 1,
+            "store_plugins": 2,
+            "previous_results": 2,
+            "previous_adapters": 1,
+            "previous_bots": 1,
+            "previous_drivers": 1,
+            "previous_plugins": 1,
+            "plugin_configs": 2,
+        }
+    )
+
+
+async def test_store_test_registry_update_lazy(
+    mocked_store_data: dict[str, Path], mocked_api: MockRouter
+):
+    """更新机器人时只需要下载并保存机器人数据"""
+    from src.providers.models import RegistryBot, RegistryUpdatePayload
+    from src.providers.store_test.store import COLLECTION_URLS, StoreTest
+    from src.providers.validation import PublishType
+
+    payload = RegistryUpdatePayload(
+        type=PublishType.BOT,
+        registry=RegistryBot(
+            name="name",
+            desc="desc",
+            author="test",
+            homepage="https://nonebot.dev",
+            tags=[],
+            is_official=False,
+        ),
+    )
+
+    test = StoreTest()
+    await test.registry_update(payload)
+
+    assert [
+        name for name, url in COLLECTION_URLS.items() if count_calls(mocked_api, url)
+    ] == snapshot(["previous_bots"])
+    assert [
+        name for name, path in mocked_store_data.items() if path.exists()
+    ] == snapshot(["bots"])
+    bots = json.loads(mocked_store_data["bots"].read_text(encoding="utf-8"))
+    assert bots[-1]["name"] == "name"
+
+
+async def test_store_test_registry_update_plugin(
+    mocked_store_data: dict[str, Path],
+    mocked_api: MockRouter,
+    validate_result: Callable,
+):
+    """更新插件时不需要下载商店插件数据，依赖关系只根据测试结果构建"""
+    from src.providers.models import RegistryUpdatePayload, StorePlugin
+    from src.providers.store_test.store import COLLECTION_URLS, StoreTest
+    from src.providers.validation import PublishType
+
+    result, plugin = validate_result(
+        StorePlugin(
+            module_name="nonebot_plugin_new",
+            project_link="nonebot-plugin-new",
+            author_id=1,
+            tags=[],
+            is_official=False,
+        )
+    )
+    result.dependencies = ["nonebot_plugin_treehelp"]
+    payload = RegistryUpdatePayload(
+        type=PublishType.PLUGIN, registry=plugin, result=result
+    )
+
+    test = StoreTest()
+    await test.registry_update(payload)
+
+    assert [
+        name for name, url in COLLECTION_URLS.items() if count_calls(mocked_api, url)
+    ] == snapshot(["previous_results", "previous_plugins", "plugin_configs"])
+    assert json.loads(
+        mocked_store_data["dependents"].read_text(encoding="utf-8")
+    ) == snapshot(
+        {
+            "nonebot-plugin-treehelp:nonebot_plugin_treehelp": [
+                "nonebot-plugin-new:nonebot_plugin_new"
+            ]
+        }
+    )
+    # 更新插件时不会改变重新测试的插件
+    assert not mocked_store_data["retests"].exists()
+
+
+async def test_store_test_local_source(
+    mocked_store_data: dict[str, Path], mocked_api: MockRouter, mocker: MockerFixture
+):
+    """从本地检出的仓库读取数据，不需要访问网络"""
+    from src.providers.store_test.store import COLLECTION_URLS, StoreTest
+
+    expected = await StoreTest.load()
+    calls = len(mocked_api.calls)
+
+    store = Path(__file__).parent / "store"
+    mocker.patch.dict(
+        COLLECTION_URLS,
+        {
+            name: (
+                store / f"{name}.json5"
+                if name.startswith("store_")
+                else store / f"{name.replace('previous_', 'registry_')}.json"
+            ).as_uri()
+            for name in COLLECTION_URLS
+        },
+    )
+    test = await StoreTest.load()
+
+    assert len(mocked_api.calls) == calls
+    assert test._store_plugins == expected._store_plugins
+    assert test._previous_results == expected._previous_results
+    assert test._plugin_configs == expected._plugin_configs
@@ -1,4 +1,9 @@
+import mmap
+from pathlib import Path
+
+import httpx
 import pytest
+from pytest_mock import MockerFixture
 from respx import MockRouter
 
 from src.providers.constants import STORE_ADAPTERS_URL
@@ -20,3 +25,317 @@ async def test_get_pypi_data_failed(mocked_api: MockRouter):
 
     with pytest.raises(ValueError, match="获取 PyPI 数据失败："):
         get_pypi_data("project_link_failed")
+
+
+async def test_shared_client(mocked_api: MockRouter):
+    """同一进程内复用 HTTP 客户端"""
+    from src.providers.utils import get_async_client, get_client, load_json_from_web
+
+    assert get_client() is get_client()
+    assert get_async_client() is get_async_client()
+
+    load_json_from_web(STORE_ADAPTERS_URL)
+    load_json_from_web(STORE_ADAPTERS_URL)
+
+    assert mocked_api["store_adapters"].call_count == 2
+
+
+async def test_close_async_client():
+    """关闭异步 HTTP 客户端后，下次获取时创建新的客户端"""
+    from src.providers.utils import close_async_client, get_async_client
+
+    client = get_async_client()
+
+    await close_async_client()
+
+    assert client.is_closed
+    assert get_async_client() is not client
+
+    await close_async_client()
+    # 没有客户端时关闭不会报错
+    await close_async_client()
+
+
+def test_cached_get(tmp_path: Path, mocker: MockerFixture, respx_mock: MockRouter):
+    """缓存响应，并通过 ETag 与 Last-Modified 重新验证"""
+    from src.providers.utils import cached_get
+
+    mocker.patch("src.providers.utils.HTTP_CACHE_DIR", str(tmp_path))
+
+    url = "https://pypi.org/pypi/project_link/json"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.headers.get("If-None-Match") == '"etag"':
+            return httpx.Response(304)
+        return httpx.Response(
+            200,
+            json={"info": {"version": "0.0.1"}},
+            headers={"ETag": '"etag"', "Last-Modified": "Fri, 01 Sep 2023"},
+        )
+
+    route = respx_mock.get(url).mock(side_effect=handler)
+
+    r = cached_get(url)
+    assert r.status_code == 200
+    assert r.json() == {"info": {"version": "0.0.1"}}
+    assert "If-None-Match" not in route.calls[0].request.headers
+
+    r = cached_get(url)
+    assert r.status_code == 200
+    assert r.json() == {"info": {"version": "0.0.1"}}
+    assert route.calls[1].request.headers["If-None-Match"] == '"etag"'
+    assert route.calls[1].request.headers["If-Modified-Since"] == "Fri, 01 Sep 2023"
+
+
+def test_cached_get_eviction(
+    tmp_path: Path, mocker: MockerFixture, respx_mock: MockRouter
+):
+    """过期的缓存与超出容量的缓存会被删除"""
+    from src.providers.utils import cached_get
+
+    mocker.patch("src.providers.utils.HTTP_CACHE_DIR", str(tmp_path))
+    mocker.patch("src.providers.utils.HTTP_CACHE_MAX_SIZE", 300)
+
+    respx_mock.get(url__startswith="https://pypi.org/").respond(
+        json={"data": "x" * 100}, headers={"ETag": '"etag"'}
+    )
+
+    cached_get("https://pypi.org/pypi/project_link1/json")
+    cached_get("https://pypi.org/pypi/project_link2/json")
+    # 超出容量，只保留最新的缓存
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+    mocker.patch("src.providers.utils.HTTP_CACHE_TTL", -1)
+    cached_get("https://pypi.org/pypi/project_link2/json")
+    # 缓存过期，不再发送条件请求
+    assert "If-None-Match" not in respx_mock.calls.last.request.headers
+
+
+def test_cached_get_eviction_threshold(
+    tmp_path: Path, mocker: MockerFixture, respx_mock: MockRouter
+):
+    """未超出容量时不会扫描缓存目录"""
+    from src.providers.utils import _evict_cache, cached_get
+
+    mocker.patch("src.providers.utils.HTTP_CACHE_DIR", str(tmp_path))
+    mocker.patch("src.providers.utils.HTTP_CACHE_MAX_SIZE", 1000)
+    mocked_evict = mocker.patch("src.providers.utils._evict_cache", wraps=_evict_cache)
+
+    respx_mock.get(url__startswith="https://pypi.org/").respond(
+        json={"data": "x" * 100}, headers={"ETag": '"etag"'}
+    )
+
+    cached_get("https://pypi.org/pypi/project_link1/json")
+    cached_get("https://pypi.org/pypi/project_link1/json")
+    cached_get("https://pypi.org/pypi/project_link2/json")
+    mocked_evict.assert_not_called()
+
+    for i in range(3, 10):
+        cached_get(f"https://pypi.org/pypi/project_link{i}/json")
+    # 超出容量时才清理缓存，清理后留有余量，不会每次写入都清理
+    assert mocked_evict.call_count == 3
+    assert sum(f.stat().st_size for f in tmp_path.glob("*.json")) <= 1000
+
+
+async def test_get_latest_versions(mocked_api: MockRouter):
+    """批量获取插件的最新版本号"""
+    from src.providers.utils import get_latest_versions
+
+    versions = await get_latest_versions(
+        [
+            "nonebot-plugin-treehelp",
+            "nonebot-plugin-datastore",
+            "project_link_failed",
+            "nonebot-plugin-treehelp",
+        ],
+        concurrency=2,
+    )
+
+    assert versions["nonebot-plugin-treehelp"] == "0.3.1"
+    assert versions["nonebot-plugin-datastore"] == "1.0.0"
+    assert isinstance(versions["project_link_failed"], ValueError)
+    # 重复的项目只请求一次
+    assert mocked_api["project_link_treehelp"].call_count == 1
+
+
+def test_dump_json_atomic(tmp_path: Path):
+    """写入时先写入临时文件再重命名"""
+    from src.providers.utils import dump_json
+
+    path = tmp_path / "dump" / "test.json"
+    path.parent.mkdir()
+    path.write_text("old", encoding="utf-8")
+
+    dump_json(path, {"name": "测试"})
+
+    assert path.read_text(encoding="utf-8") == '{"name":"测试"}'
+    assert [p.name for p in path.parent.iterdir()] == ["test.json"]
+
+
+def test_get_env_hash():
+    """测试环境哈希值只与实际影响测试的内容有关"""
+    from src.providers.store_test.utils import get_env_hash
+
+    env_hash = get_env_hash(
+        "0.1.0", {"nonebot2": "2.4.0", "pydantic": "2.10.0"}, "3.12", ""
+    )
+
+    # 包的顺序与名称写法、安装工具自带的包与 Python 修订版本号不影响哈希值
+    assert env_hash == get_env_hash(
+        "0.1.0",
+        {"Pydantic": "2.10.0", "nonebot2": "2.4.0", "pip": "24.3.1"},
+        "3.12.7",
+        "",
+    )
+    # 依赖版本、Python 版本与插件配置都会改变哈希值
+    assert env_hash != get_env_hash(
+        "0.1.0", {"nonebot2": "2.4.1", "pydantic": "2.10.0"}, "3.12", ""
+    )
+    assert env_hash != get_env_hash(
+        "0.1.0", {"nonebot2": "2.4.0", "pydantic": "2.10.0"}, "3.13", ""
+    )
+    assert env_hash != get_env_hash(
+        "0.1.0", {"nonebot2": "2.4.0", "pydantic": "2.10.0"}, "3.12", "A=1"
+    )
+
+
+async def test_resolve_requirements(mocker: MockerFixture):
+    """在本地通过 uv 解析插件依赖"""
+    from src.providers.store_test.utils import resolve_requirements
+
+    mocked_process = mocker.MagicMock(returncode=0)
+    mocked_process.communicate = mocker.AsyncMock(
+        return_value=(b"nonebot2==2.4.0\npydantic==2.10.0\n", None)
+    )
+    mocked_exec = mocker.patch(
+        "asyncio.create_subprocess_exec", return_value=mocked_process
+    )
+
+    assert await resolve_requirements("project_link", "3.12") == {
+        "nonebot2": "2.4.0",
+        "pydantic": "2.10.0",
+    }
+    assert mocked_exec.call_args.args[:4] == ("uv", "pip", "compile", "-")
+    mocked_process.communicate.assert_awaited_once_with(b"project_link")
+
+    # 解析失败
+    mocked_process.returncode = 1
+    assert await resolve_requirements("project_link", "3.12") is None
+
+    # 没有安装 uv
+    mocked_exec.side_effect = FileNotFoundError
+    assert await resolve_requirements("project_link", "3.12") is None
+
+
+async def test_load_json_async_failed(mocked_api: MockRouter):
+    """测试异步加载 json 失败"""
+    from src.providers.utils import load_json_from_web_async
+
+    mocked_api.get(STORE_ADAPTERS_URL).respond(404)
+
+    with pytest.raises(ValueError, match="下载文件失败："):
+        await load_json_from_web_async(STORE_ADAPTERS_URL)
+
+
+def test_url_to_path(tmp_path: Path):
+    """本地路径与 file:// 网址都会被识别为本地文件"""
+    from src.providers.utils import url_to_path
+
+    assert url_to_path(str(tmp_path / "a.json")) == tmp_path / "a.json"
+    assert url_to_path((tmp_path / "中文.json").as_uri()) == tmp_path / "中文.json"
+    assert url_to_path(STORE_ADAPTERS_URL) is None
+
+
+def test_load_json_from_local(tmp_path: Path, mocker: MockerFixture):
+    """读取本地文件，较大的文件通过内存映射读取"""
+    from src.providers.utils import load_json_from_url
+
+    path = tmp_path / "plugins.json5"
+    path.write_text('[{name: "帮助",},]', encoding="utf-8")
+
+    assert load_json_from_url(str(path)) == [{"name": "帮助"}]
+
+    mocked_mmap = mocker.patch("mmap.mmap", wraps=mmap.mmap)
+    mocker.patch("src.providers.utils.LOCAL_MMAP_THRESHOLD", 0)
+    assert load_json_from_url(path.as_uri()) == [{"name": "帮助"}]
+    mocked_mmap.assert_called_once()
+
+
+def test_is_json5():
+    """通过扩展名或者内容类型判断数据格式"""
+    from src.providers.constants import REGISTRY_RESULTS_URL
+    from src.providers.utils import is_json5
+
+    assert is_json5(STORE_ADAPTERS_URL)
+    assert not is_json5(REGISTRY_RESULTS_URL)
+    assert not is_json5("https://api.github.com/user/1", "application/json")
+    assert not is_json5(
+        "https://api.github.com/user/1", "application/json; charset=utf-8"
+    )
+    assert is_json5("https://api.github.com/user/1", "text/plain")
+
+
+def test_decode_json_parity():
+    """标准库与 pyjson5 解析出的数据一致"""
+    import pyjson5
+
+    from src.providers.utils import decode_json
+
+    for path in (Path(__file__).parent / "store").glob("*.json"):
+        data = path.read_bytes()
+        assert decode_json(data, json5=False) == pyjson5.decode(data.decode("utf-8"))
+
+    # 不符合标准的 JSON 仍然可以解析
+    assert decode_json('{"name": "帮助",}'.encode(), json5=False) == {"name": "帮助"}
+
+
+@pytest.mark.parametrize("minify", [True, False])
+def test_serializer_parity(minify: bool):
+    """不同序列化方式的输出完全一致"""
+    from src.providers.models import RegistryPlugin, StoreTestResult
+    from src.providers.utils import JSON_SERIALIZERS, load_json_from_file
+
+    store = Path(__file__).parent / "store"
+    data = {
+        "results": {
+            key: StoreTestResult(**value, duration=12.345, install_size=1024)
+            for key, value in load_json_from_file(
+                store / "registry_results.json"
+            ).items()
+        },
+        "plugins": [
+            RegistryPlugin(**plugin)
+            for plugin in load_json_from_file(store / "registry_plugins.json")
+        ],
+        "text": 'a"b\\c\n\t\x00\x7f é😀',
+        "numbers": [0, -1, 2**70, 0.1, 3.0, -0.0, 0.001, 1.5e15, 1e16, -2.5e-7],
+        "special": [float("nan"), float("inf"), float("-inf")],
+        "exponent": '1e16 \\"2e-7" 3e5',
+        "empty": [[], {}],
+    }
+
+    outputs = {
+        name: serializer(data, None if minify else 2)
+        for name, serializer in JSON_SERIALIZERS.items()
+    }
+    assert outputs["pydantic"] == outputs["json"]
+
+
+def test_dump_json_serializer(tmp_path: Path, mocker: MockerFixture):
+    """通过环境变量选择序列化方式"""
+    from src.providers.utils import dump_json, dumps_json
+
+    mocked_to_json = mocker.patch(
+        "src.providers.utils.to_json", return_value='{"name":"帮助"}'.encode()
+    )
+
+    mocker.patch("src.providers.utils.JSON_SERIALIZER", "pydantic")
+    dump_json(tmp_path / "a.json", {"name": "帮助"})
+    assert mocked_to_json.call_count == 1
+
+    mocker.patch("src.providers.utils.JSON_SERIALIZER", "json")
+    dump_json(tmp_path / "b.json", {"name": "帮助"})
+    assert mocked_to_json.call_count == 1
+
+    assert (tmp_path / "a.json").read_bytes() == (tmp_path / "b.json").read_bytes()
+    assert dumps_json({"name": "帮助"}) == '{"name":"帮助"}'
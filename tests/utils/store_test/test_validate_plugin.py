@@ -475,3 +475,104 @@ async def test_validate_plugin_failed_with_previous(
     )
 
     assert mocked_api["homepage"].called
+
+
+async def test_validate_plugin_matrix(
+    mocked_api: MockRouter, mocker: MockerFixture
+) -> None:
+    """同时在多个 Python 版本中测试插件
+
+    加载结果与元数据以主要版本为准，其他版本的结果只记录在测试环境中
+    """
+    from src.providers.docker_test import DockerTestResult
+    from src.providers.models import StorePlugin
+    from src.providers.store_test.utils import get_env_hash
+    from src.providers.store_test.validation import validate_plugin
+
+    mocker.patch(
+        "src.providers.store_test.validation.PLUGIN_TEST_PYTHON_VERSIONS",
+        ["3.12", "3.13", "3.14"],
+    )
+    mocker.patch("src.providers.store_test.validation.PLUGIN_TEST_INSTALLER", "uv")
+    success = DockerTestResult(
+        **json.loads((Path(__file__).parent / "output.json").read_text())
+    )
+    success.test_env = "python==3.12.7"
+    success.requirements = {"project_link": "0.2.0", "nonebot2": "2.4.0"}
+    failed = DockerTestResult(
+        **json.loads((Path(__file__).parent / "output_failed.json").read_text())
+    )
+    failed.test_env = "python==3.13.0"
+    not_run = DockerTestResult(run=False, load=False, metadata=None, outputs=[])
+    mock_plugin_test = mock_docker_result(Path(__file__).parent / "output.json", mocker)
+    mock_plugin_test.run_matrix = mocker.AsyncMock(
+        return_value={"3.12": success, "3.13": failed, "3.14": not_run}
+    )
+
+    plugin = StorePlugin(
+        module_name="module_name",
+        project_link="project_link",
+        author_id=1,
+        tags=[],
+        is_official=True,
+    )
+
+    result, new_plugin = await validate_plugin(plugin, "")
+
+    mock_plugin_test.run_matrix.assert_awaited_once_with(["3.12", "3.13", "3.14"])
+    mock_plugin_test.run.assert_not_awaited()
+    assert result.test_env == snapshot(
+        {"python==3.12.7": True, "python==3.13.0": False, "python==3.14": False}
+    )
+    assert result.results["load"] is True
+    assert result.version == "0.2.0"
+    assert result.outputs["metadata"] == success.metadata
+    assert result.outputs["load"].startswith("Python 3.12:\n")
+    assert "\nPython 3.13:\n" in result.outputs["load"]
+    assert new_plugin.name == "TREEHELP"
+    # 测试环境的哈希值使用主要版本计算
+    assert result.env_hash == get_env_hash(
+        "0.2.0", {"project_link": "0.2.0", "nonebot2": "2.4.0"}, "3.12", ""
+    )
+
+
+async def test_validate_plugin_concurrent(
+    mocked_api: MockRouter, mocker: MockerFixture
+) -> None:
+    """同时验证多个插件时，同步请求不会阻塞其他插件"""
+    import asyncio
+    import threading
+
+    from src.providers.models import StorePlugin
+    from src.providers.store_test.validation import validate_plugin
+
+    mock_docker_result(Path(__file__).parent / "output.json", mocker)
+
+    # 只有两个插件同时请求 PyPI 时才能通过
+    barrier = threading.Barrier(2, timeout=5)
+
+    def get_upload_time(project_link: str) -> str:
+        barrier.wait()
+        return "2023-09-01T00:00:00+00:00Z"
+
+    mocker.patch("src.providers.store_test.validation.get_upload_time", get_upload_time)
+
+    plugins = [
+        StorePlugin(
+            module_name=f"module_name_{i}",
+            project_link="project_link",
+            author_id=1,
+            tags=[],
+            is_official=True,
+        )
+        for i in range(2)
+    ]
+
+    results = await asyncio.gather(*(validate_plugin(plugin, "") for plugin in plugins))
+
+    assert [result.results for result, _ in results] == snapshot(
+        [
+            {"validation": True, "load": True, "metadata": True},
+            {"validation": True, "load": True, "metadata": True},
+        ]
+    )